@@ -1,9 +1,16 @@
 from argparse import ArgumentParser, Namespace
+from asyncio import run
 
+from api.recorder import TrafficRecorder
+from async_controller import AsyncController
+from bench import Benchmarks
 from controller import Controller
 from handlers.saves_handler import SavesHandler
 from model.dao import GameDataDAO
 from model.models import GameData
+from replayer import Replayer
+from simulator import Simulator
+from stand_in_server import StandInBoard, StandInServer
 
 
 class App:
@@ -33,6 +40,50 @@ class App:
         auto_parser.add_argument("name", type=str, help="Name of save to run")
         auto_parser.set_defaults(func=self.run)
 
+        async_parser = subparser.add_parser("arun")
+        async_parser.add_argument("names", type=str, nargs="+", help="Names of saves to run concurrently")
+        async_parser.set_defaults(func=self.run_async)
+
+        record_parser = subparser.add_parser("record")
+        record_parser.add_argument("name", type=str, help="Name of save to run")
+        record_parser.add_argument("log", type=str, help="Path of traffic log to write")
+        record_parser.set_defaults(func=self.record)
+
+        replay_parser = subparser.add_parser("replay")
+        replay_parser.add_argument("log", type=str, help="Path of recorded traffic log")
+        replay_parser.add_argument("-s", dest="name", type=str, help="Save to start from (is not modified)")
+        replay_parser.add_argument("--no-render", dest="render", action="store_false", help="Skip map rendering")
+        replay_parser.set_defaults(func=self.replay)
+
+        bench_clean_parser = subparser.add_parser("bench-clean")
+        bench_clean_parser.add_argument("logs", type=str, nargs="+", help="Recorded traffic logs to take comments from")
+        bench_clean_parser.set_defaults(func=self.bench_clean)
+
+        simulate_parser = subparser.add_parser("simulate")
+        simulate_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        simulate_parser.add_argument("--players", type=int, default=20, help="Countries registered in each thread")
+        simulate_parser.add_argument("--roll-bases", type=int, default=0, help="Extra roll bases of existing countries")
+        simulate_parser.add_argument("--explicit", type=int, default=300, help="Rolls for explicit tiles")
+        simulate_parser.add_argument("--expansion", type=int, default=200, help="Expansion rolls")
+        simulate_parser.add_argument("--attack", type=int, default=100, help="Attack rolls")
+        simulate_parser.add_argument("--invalid", type=int, default=50, help="Invalid roll bases and rolls")
+        simulate_parser.add_argument("--chatter", type=int, default=200, help="Posts without rolls")
+        simulate_parser.add_argument("--batch", type=int, default=50, help="New posts per thread fetch")
+        simulate_parser.add_argument("--no-render", dest="render", action="store_false", help="Skip map rendering")
+        simulate_parser.add_argument("--memory", action="store_true", help="Also trace peak Python allocations with tracemalloc (slows rendering down)")
+        simulate_parser.set_defaults(func=self.simulate)
+
+        stand_in_parser = subparser.add_parser("stand-in")
+        stand_in_parser.add_argument("-p", dest="port", type=int, default=8080, help="Port to listen on")
+        stand_in_parser.add_argument("-b", dest="board", type=str, default="b", help="Board code")
+        stand_in_parser.add_argument("-t", dest="thread", type=int, default=100000, help="Initial thread number")
+        stand_in_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        stand_in_parser.add_argument("--post-rate", type=float, default=0.2, help="Synthetic posts per second")
+        stand_in_parser.add_argument("--latency", type=float, default=0.0, help="Mean response latency, seconds")
+        stand_in_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 503 responses")
+        stand_in_parser.add_argument("--rate-limit", type=float, default=0.0, help="Share of posts rejected as too fast")
+        stand_in_parser.set_defaults(func=self.stand_in)
+
         args = parser.parse_args()
 
         if not args.command:
@@ -85,7 +136,7 @@ class App:
             print(f"Save '{name}' does not exist")
             return
 
-        dao = GameDataDAO(SavesHandler.load(name))
+        dao = GameDataDAO.load(name)
 
         state_changed = False
 
@@ -105,7 +156,7 @@ class App:
             print("No params specified")
             return
 
-        SavesHandler.dump(name, dao.model)
+        dao.snapshot(name)
         print(f"Updated save '{name}'")
 
     @staticmethod
@@ -118,6 +169,88 @@ class App:
 
         Controller(name).loop()
 
+    @staticmethod
+    def record(args: Namespace) -> None:
+        name = args.name
+
+        if not SavesHandler.exists(name):
+            print(f"Save '{name}' does not exist")
+            return
+
+        controller = Controller(name)
+
+        with TrafficRecorder(args.log) as recorder:
+            controller.api.recorder = recorder
+            controller.loop()
+
+    @staticmethod
+    def replay(args: Namespace) -> None:
+        name = args.name
+
+        if name and not SavesHandler.exists(name):
+            print(f"Save '{name}' does not exist")
+            return
+
+        game_data = SavesHandler.load(name) if name else GameData()
+        controller = Controller(name or "replay", game_data=game_data, auto_approve=True)
+
+        Replayer(controller, render=args.render).replay(TrafficRecorder.read(args.log))
+
+    @staticmethod
+    def bench_clean(args: Namespace) -> None:
+        Benchmarks.clean(
+            record
+            for log in args.logs
+            for record in TrafficRecorder.read(log)
+        )
+
+    @staticmethod
+    def simulate(args: Namespace) -> None:
+        Simulator(
+            seed=args.seed,
+            players=args.players,
+            roll_bases=args.roll_bases,
+            explicit=args.explicit,
+            expansion=args.expansion,
+            attack=args.attack,
+            invalid=args.invalid,
+            chatter=args.chatter,
+            batch=args.batch,
+            render=args.render,
+            memory=args.memory,
+        ).run()
+
+    @staticmethod
+    def stand_in(args: Namespace) -> None:
+        board = StandInBoard(
+            board=args.board,
+            thread_num=args.thread,
+            seed=args.seed,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            rate_limit=args.rate_limit,
+        )
+        server = StandInServer(board, port=args.port, post_rate=args.post_rate)
+        server.start_generator()
+
+        print(f"Stand-in board is listening on {server.base_url}")
+        print(f"Set BASE_URL={server.base_url} and thread {args.thread} to use it")
+
+        try:
+            server.serve_forever()
+        finally:
+            print(f"\nResponses: {board.stats}")
+            server.server_close()
+
+    @staticmethod
+    def run_async(args: Namespace) -> None:
+        for name in args.names:
+            if not SavesHandler.exists(name):
+                print(f"Save '{name}' does not exist")
+                return
+
+        run(AsyncController.run_all(args.names))
+
 
 if __name__ == "__main__":
     try:
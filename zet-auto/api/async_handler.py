@@ -0,0 +1,32 @@
+from asyncio import to_thread
+from typing import Dict
+
+from requests import Response
+
+from api.handler import DvachAPIHandler
+from api.models import DvachThread
+from api.schemas import DvachPostingSchemaIn
+
+
+class AsyncDvachAPIHandler:
+    def __init__(self, api: DvachAPIHandler):
+        # запросы идут через пул соединений синхронного хендлера в потоках,
+        # так что несколько корутин могут ждать ответа одновременно
+        self.api = api
+
+    def update_cookies(self, cookies: Dict[str, str]) -> None:
+        self.api.update_cookies(cookies)
+
+    def close(self) -> None:
+        self.api.close()
+
+    async def get_thread(self, board: str, thread_num: str | int, after: int = 0) -> DvachThread | None:
+        return await to_thread(self.api.get_thread, board, thread_num, after)
+
+    async def get_thread_after(
+            self, board: str, thread_num: str | int, post_num: int, after: int = 0,
+    ) -> DvachThread | None:
+        return await to_thread(self.api.get_thread_after, board, thread_num, post_num, after)
+
+    async def post_posting(self, schema: DvachPostingSchemaIn, headers: Dict = None, cookies: Dict = None) -> Response:
+        return await to_thread(self.api.post_posting, schema, headers, cookies)
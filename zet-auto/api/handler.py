@@ -1,15 +1,19 @@
-from typing import Dict
+from bisect import bisect_right
+from typing import Dict, List, Tuple
 
-from requests import Response, get, post
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 
 from config import DvachConfig
-from api.models import DvachThread, Post
+from api.recorder import TrafficRecorder
+from api.models import CachedThread, DvachThread, Post, parse_post_datetime
 from api.schemas import DvachPostingSchemaIn
 
 
 class DvachAPIHandler:
     def __init__(self, usercode: str, usercode_auth: str, passcode_auth: str,
-                 use_proxy: bool = False, proxy: str = None):
+                 use_proxy: bool = False, proxy: str = None, pool_size: int = 10,
+                 timeout: Tuple[float, float] | None = None):
         self.usercode = usercode
         self.cookies = {
             'usercode_auth': usercode_auth,
@@ -28,39 +32,166 @@ class DvachAPIHandler:
             "https": proxy,
         } if self.use_proxy else None
 
-    def update_cookies(self, cookies: Dict[str, str]) -> None:
-        self.cookies.update(cookies)
+        # одна keep-alive сессия на хендлер: соединения (и туннели через прокси) переиспользуются
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
 
-    def get_thread(self, board: str, thread_num: str | int) -> DvachThread | None:
-        r = self.get_thread_raw(board, thread_num)
+        self.session.headers.update(self.headers)
+        self.session.cookies.update(self.cookies)
+        # прокси передаются в каждый запрос: session.proxies перебиваются переменными HTTP(S)_PROXY
 
-        if r.status_code != 200:
-            return None
+        # (соединение, чтение) в секундах: без таймаута зависшее соединение держит цикл вечно
+        self.timeout = timeout
+
+        self.recorder: TrafficRecorder | None = None
+
+        # валидаторы последнего ответа по (доска, тред, вид запроса) для условных GET
+        self._thread_cache: Dict[Tuple[str, str, str], CachedThread] = {}
+
+    def __enter__(self) -> "DvachAPIHandler":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def update_cookies(self, cookies: Dict[str, str]) -> None:
+        self.cookies.update(cookies)
+        self.session.cookies.update(cookies)
 
-        posts = r.json()['threads'][0]['posts']
+    @staticmethod
+    def _parse_posts(posts: List[Dict], after: int = 0) -> List[Post]:
+        # номера постов в треде монотонны, так что уже обработанные посты
+        # отсекаются бинпоиском и в pydantic не попадают
+        start = bisect_right(posts, after, key=lambda p: p.get('number')) if after else 0
 
-        posts = [Post(
+        return [Post(
             num=p.get('num'),
             number=p.get('number'),
             comment=p.get('comment'),
             datetime=p.get('date'),
             sage=p.get('email') == 'mailto:sage',
-        ) for p in posts]
+        ) for p in posts[start:]]
 
-        return DvachThread(posts=posts)
+    @classmethod
+    def build_thread(cls, posts: List[Dict], after: int = 0, modified: bool = True) -> DvachThread:
+        # последний бамп ищется по сырым постам, так что он есть даже если
+        # сами посты до after не декодировались
+        last_bump = next((
+            parse_post_datetime(p.get('date'))
+            for p in reversed(posts)
+            if p.get('email') != 'mailto:sage'
+        ), None)
 
-    def get_thread_raw(self, board: str, thread_num: str | int) -> Response:
-        url = f'{DvachConfig.BASE_URL}/{board}/res/{thread_num}.json'
+        return DvachThread(
+            posts=cls._parse_posts(posts, after),
+            modified=modified,
+            last_bump=last_bump,
+        )
+
+    def _get_conditional(self, key: Tuple[str, str, str], url: str) -> Response:
+        headers = {}
 
-        if not self.use_proxy:
-            r = get(url, cookies=self.cookies, headers=self.headers)
-        else:
-            r = get(url, cookies=self.cookies, headers=self.headers, proxies=self.proxies)
+        cached = self._thread_cache.get(key)
+        if cached and cached.url == url:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
 
-        print(f"GET - {url} - {r}")
+        r = self.session.get(url, headers=headers, proxies=self.proxies, timeout=self.timeout)
+
+        print(f"GET - {url} - {r} - {r.elapsed.total_seconds():.3f} с")
+
+        if self.recorder:
+            self.recorder.record(key[2], r)
 
         return r
 
+    def _from_cache(self, key: Tuple[str, str, str], url: str, after: int = 0) -> DvachThread | None:
+        cached = self._thread_cache.get(key)
+
+        if not cached or cached.url != url:
+            return None
+
+        return self.build_thread(cached.posts, after, modified=False)
+
+    def _to_cache(self, key: Tuple[str, str, str], url: str, r: Response, posts: List[Dict]) -> None:
+        etag, last_modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+
+        if not etag and not last_modified:
+            self._thread_cache.pop(key, None)
+            return
+
+        # запрошенный адрес, а не r.url: после редиректа они не совпадут с тем, что сверяется потом
+        self._thread_cache[key] = CachedThread(
+            url=url,
+            etag=etag,
+            last_modified=last_modified,
+            posts=posts,
+        )
+
+    def get_thread(self, board: str, thread_num: str | int, after: int = 0) -> DvachThread | None:
+        key = (board, str(thread_num), 'full')
+        url = self._thread_url(board, thread_num)
+        r = self._get_conditional(key, url)
+
+        if r.status_code == 304:
+            return self._from_cache(key, url, after)
+
+        if r.status_code != 200:
+            return None
+
+        raw_posts = r.json()['threads'][0]['posts']
+        self._to_cache(key, url, r, raw_posts)
+
+        return self.build_thread(raw_posts, after)
+
+    @staticmethod
+    def _thread_url(board: str, thread_num: str | int) -> str:
+        return f'{DvachConfig.BASE_URL}/{board}/res/{thread_num}.json'
+
+    def get_thread_raw(self, board: str, thread_num: str | int) -> Response:
+        return self._get_conditional((board, str(thread_num), 'full'), self._thread_url(board, thread_num))
+
+    def get_thread_after(
+            self, board: str, thread_num: str | int, post_num: int, after: int = 0,
+    ) -> DvachThread | None:
+        key = (board, str(thread_num), 'after')
+        url = self._after_url(board, thread_num, post_num)
+        r = self._get_conditional(key, url)
+
+        if r.status_code == 304:
+            return self._from_cache(key, url, after)
+
+        if r.status_code != 200:
+            return None
+
+        try:
+            data = r.json()
+            if data.get('error'):
+                return None
+            raw_posts = data['posts']
+            thread = self.build_thread(raw_posts, after)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        self._to_cache(key, url, r, raw_posts)
+
+        return thread
+
+    @staticmethod
+    def _after_url(board: str, thread_num: str | int, post_num: int) -> str:
+        # посты начиная с post_num включительно
+        return f'{DvachConfig.BASE_URL}/api/mobile/v2/after/{board}/{thread_num}/{post_num}'
+
+    def get_thread_after_raw(self, board: str, thread_num: str | int, post_num: int) -> Response:
+        return self._get_conditional((board, str(thread_num), 'after'), self._after_url(board, thread_num, post_num))
+
     def post_posting(self, schema: DvachPostingSchemaIn, headers: Dict = None, cookies: Dict = None) -> Response:
         url = f'{DvachConfig.BASE_URL}/user/posting?nc=1'
 
@@ -69,19 +200,17 @@ class DvachAPIHandler:
 
         if not headers:
             headers = dict()
-        headers.update(self.headers)
         headers.update({'Content-Type': data.content_type})
 
-        if not cookies:
-            cookies = dict()
-        cookies.update(self.cookies)
+        # заголовки и куки сессии подмешиваются самим requests
+        r = self.session.post(
+            url, data=data, headers=headers, cookies=cookies, proxies=self.proxies, timeout=self.timeout,
+        )
 
-        if not self.use_proxy:
-            r = post(url, data=data, headers=headers, cookies=cookies)
-        else:
-            r = post(url, data=data, headers=headers, cookies=cookies, proxies=self.proxies)
+        if self.recorder:
+            self.recorder.record('post', r)
 
-        print(f"POST - {url} - {r}")
+        print(f"POST - {url} - {r} - {r.elapsed.total_seconds():.3f} с")
         print(data)
         print(r.request.headers)
         print(r)
@@ -1,10 +1,17 @@
+from datetime import datetime
 from io import BytesIO
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from PIL import Image
 from pydantic import BaseModel
 
 
+def parse_post_datetime(s: str) -> datetime:
+    # "18/10/26 Вск 12:34:56" - день недели выкидываем
+    post_time = s.split()
+    return datetime.strptime(post_time[0] + ' ' + post_time[2], "%d/%m/%y %H:%M:%S")
+
+
 class ImageFile(BaseModel):
     class Config:
         arbitrary_types_allowed = True
@@ -27,6 +34,20 @@ class Post(BaseModel):
     datetime: str
     sage:     bool
 
+    @property
+    def parsed_datetime(self) -> datetime:
+        return parse_post_datetime(self.datetime)
+
 
 class DvachThread(BaseModel):
-    posts:   List[Post] = []
+    posts:    List[Post] = []
+    modified: bool = True  # False - сервер ответил 304, посты взяты из кэша
+
+    last_bump: datetime | None = None  # время последнего не-сажевого поста среди полученных
+
+
+class CachedThread(BaseModel):
+    url:           str
+    etag:          str | None = None
+    last_modified: str | None = None
+    posts:         List[Dict] = []  # сырые посты, декодируются лениво
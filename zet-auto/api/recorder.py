@@ -0,0 +1,55 @@
+from gzip import open as gzip_open
+from json import dumps, loads
+from os import PathLike
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Iterator
+
+from pydantic import BaseModel
+from requests import Response
+
+
+class TrafficRecord(BaseModel):
+    time:   float
+    kind:   str  # full | after | post
+    url:    str
+    status: int
+    body:   str
+
+
+class TrafficRecorder:
+    def __init__(self, path: str | PathLike[str]) -> None:
+        self.path = Path(path)
+        self._lock = Lock()
+        # gzip допускает дозапись новыми членами, так что лог можно продолжать между запусками
+        self._file = gzip_open(self.path, 'at', encoding='utf-8')
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def record(self, kind: str, r: Response) -> None:
+        line = dumps({
+            "time": time(),
+            "kind": kind,
+            "url": r.url,
+            "status": r.status_code,
+            "body": r.text,
+        }, ensure_ascii=False, separators=(',', ':'))
+
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @staticmethod
+    def read(path: str | PathLike[str]) -> Iterator[TrafficRecord]:
+        with gzip_open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield TrafficRecord(**loads(line))
@@ -0,0 +1,140 @@
+from enum import Enum
+from json import JSONDecodeError
+from random import uniform
+from time import monotonic
+from typing import Tuple
+
+from requests import Response
+
+
+class Verdict(Enum):
+    OK = "ok"
+    RETRY = "retry"
+    FATAL = "fatal"      # не вышел только этот пост
+    BLOCKED = "blocked"  # постинг закрыт целиком: бан или нет доступа
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, cooldown: float = 300) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def remaining(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(self._opened_at + self.cooldown - monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        # после кулдауна пропускаем пробный запрос (half-open)
+        return not self.is_open or self.remaining() <= 0
+
+    def success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.threshold or self.is_open:
+            self._opened_at = monotonic()
+
+    def trip(self) -> None:
+        self._failures = self.threshold
+        self._opened_at = monotonic()
+
+
+class RetryPolicy:
+    # коды ошибок макабы, при которых повтор того же поста ничего не изменит
+    FATAL_CODES = {
+        -2,   # доска не существует
+        -3,   # тред не существует
+        -5,   # капча не принята
+        -7,   # тред закрыт
+        -9,   # превышен лимит длины поля
+        -10,  # файл уже был загружен
+        -11,  # формат файла не поддерживается
+        -12,  # файл слишком большой
+        -13,  # слишком много файлов
+    }
+    # а при этих не выйдут и следующие посты, так что постинг встаёт на кулдаун
+    BLOCKING_CODES = {
+        -4,   # нет доступа
+        -6,   # бан
+    }
+    # а тут стоит подождать и повторить
+    RETRYABLE_CODES = {
+        -8,   # постинг слишком быстро
+    }
+    RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524}
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 5, max_delay: float = 60,
+                 jitter: float = 0.5, breaker: CircuitBreaker | None = None) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.breaker = breaker or CircuitBreaker()
+
+    def classify(self, r: Response | None, error: Exception | None = None) -> Tuple[Verdict, str]:
+        if error is not None or r is None:
+            return Verdict.RETRY, f"ошибка соединения: {error}"
+
+        if r.status_code in self.RETRYABLE_STATUSES:
+            return Verdict.RETRY, f"HTTP {r.status_code}"
+
+        if r.status_code != 200:
+            return Verdict.FATAL, f"HTTP {r.status_code}"
+
+        try:
+            data = r.json()
+        except (JSONDecodeError, ValueError):
+            return Verdict.RETRY, "ответ не JSON"
+
+        if data.get("result"):
+            return Verdict.OK, "ок"
+
+        details = data.get("error") or {}
+        code, message = details.get("code"), details.get("message", "")
+
+        if code in self.FATAL_CODES:
+            return Verdict.FATAL, f"{code} {message}"
+
+        if code in self.BLOCKING_CODES:
+            return Verdict.BLOCKED, f"{code} {message}"
+
+        # неизвестные коды повторяем, но не дольше max_attempts
+        return Verdict.RETRY, f"{code} {message}"
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.base_delay * 2 ** attempt, self.max_delay)
+
+        if self.jitter:
+            delay *= uniform(1 - self.jitter, 1 + self.jitter)
+
+        return delay
+
+    def allow(self) -> bool:
+        return self.breaker.allow()
+
+    def record(self, verdict: Verdict) -> None:
+        # отказ в одном посте (капча, закрытый тред, дубль) ничего не говорит о борде:
+        # на выключатель влияют только сбои и бан
+        if verdict is Verdict.OK:
+            self.breaker.success()
+        elif verdict is Verdict.BLOCKED:
+            self.breaker.trip()
+        elif verdict is Verdict.RETRY:
+            self.breaker.failure()
+
+    def should_retry(self, verdict: Verdict, attempt: int) -> bool:
+        return (
+            verdict is Verdict.RETRY
+            and attempt + 1 < self.max_attempts
+            and self.breaker.allow()
+        )
@@ -0,0 +1,193 @@
+from asyncio import gather, sleep, to_thread
+from datetime import datetime
+from typing import List
+
+from requests import Response
+from requests.exceptions import ConnectionError, Timeout
+
+from api.async_handler import AsyncDvachAPIHandler
+from api.models import DvachThread
+from api.retry_policy import Verdict
+from api.schemas import DvachPostingSchemaIn
+from config import AppConfig
+from controller import Controller
+from exceptions import ThreadNotSetException, ThreadNotFoundException
+
+
+# синхронные методы Controller остаются как есть, асинхронные версии называются с префиксом "a",
+# чтобы унаследованный синхронный код никогда не получил вместо результата корутину
+class AsyncController(Controller):
+    def __init__(self, model_name: str) -> None:
+        super().__init__(model_name)
+        self.async_api = AsyncDvachAPIHandler(self.api)
+
+    async def _aposting(self, schema: DvachPostingSchemaIn, name: str) -> Response | None:
+        if not self._posting_allowed(f"{self.name}: {name}"):
+            return None
+
+        attempt = 0
+
+        while True:
+            r, error = None, None
+            try:
+                r = await self.async_api.post_posting(schema)
+            except (ConnectionError, Timeout) as e:
+                error = e
+
+            verdict = self._posting_attempt(r, error, f"[{self.name}] {name}", attempt)
+
+            if verdict is Verdict.OK:
+                return r
+
+            if not self.retry_policy.should_retry(verdict, attempt):
+                return None
+
+            await self.asleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    async def aposting_bump(self) -> None:
+        await self._aposting(self._bump_schema(), 'Бамп')
+
+    async def aposting_post(self) -> None:
+        # отрисовка карты - чистый CPU, уводим её с цикла событий
+        schema = await to_thread(self._post_schema)
+
+        r = await self._aposting(schema, 'Постинг')
+        if r:
+            del self.paste_handler.paste
+
+    async def aposting_thread(self) -> None:
+        schema = await to_thread(self._thread_schema)
+
+        r = await self._aposting(schema, 'Создание треда')
+
+        if not r:
+            return
+
+        self._thread_posted(r)
+
+    async def aposting_announcement(self, thread_num: str | int) -> None:
+        await self._aposting(self._announcement_schema(thread_num), 'Анонс переката')
+
+    async def afetch_thread(self, incremental: bool = AppConfig.INCREMENTAL_FETCH) -> DvachThread | None:
+        after = self.dao.last_number - 1
+
+        if incremental and self._last_num:
+            thread = await self.async_api.get_thread_after(self.dao.board, self.dao.thread, self._last_num, after)
+            if self._is_increment_valid(thread):
+                return thread
+
+            print(f"[{self.name}] Не удалось получить только новые посты, получаем тред целиком...")
+
+        return await self.async_api.get_thread(self.dao.board, self.dao.thread, after)
+
+    async def asnapshot(self) -> DvachThread | None:
+        if self._snapshot is None:
+            self._remember_snapshot(await self.afetch_thread())
+        return self._snapshot
+
+    async def acheck_drowning(self) -> bool:
+        await self.asnapshot()
+        return self.is_drowning(self._last_bump)
+
+    async def acheck_bump_limit(self) -> bool:
+        if not self.dao.last_number >= 500:  # hardcoded bump limit
+            return False
+
+        self.paste_handler.bump_limit()
+        await self.aposting_post()
+        await self.asleep()
+
+        if not AppConfig.MAKE_PEREKATS:
+            print(f"[{self.name}] отмена переката - конфиг сказал ноу")
+            return True
+
+        old_thread = self.dao.thread
+
+        await self.aposting_thread()
+        await self.asleep()
+
+        await self.aposting_announcement(old_thread)
+
+        return True
+
+    @staticmethod
+    async def asleep(timeout: float = 10) -> None:
+        await sleep(timeout)
+
+    async def aloop_iter(self) -> None:
+        if not self.dao.board or not self.dao.thread:
+            raise ThreadNotSetException
+
+        print(f"{f'  {self.name} - {datetime.now()}  ':=^80}")
+
+        self.invalidate_snapshot()
+
+        print(f"[{self.name}] Получаем тред...")
+        self._parse_fetched(await self.asnapshot())
+
+        if self.paste_handler.paste:
+            self._print_paste()
+
+            print(f"[{self.name}] Постим карту...")
+            await self.aposting_post()
+            return
+
+        print(f"[{self.name}] == Нет новых захватов для отрисовки ==")
+
+        print(f"[{self.name}] Проверяем бамплимит...")
+        if await self.acheck_bump_limit():
+            return
+
+        print(f"[{self.name}] Проверяем на затопленность...")
+        if await self.acheck_drowning():
+            await self.aposting_bump()
+            return
+
+    async def aloop(self) -> None:
+        is_running = True
+
+        while is_running:
+            try:
+                await self.aloop_iter()
+                self.save()
+
+            except ThreadNotSetException as e:
+                print(f"[{self.name}] {e.message}")
+                print(f"Хотите запилить новый? Доска - {self.dao.board} (да/нет)")
+                answer = (await to_thread(input)).lower()
+
+                if answer not in {"да", "y"}:
+                    print("Пон, отдыхаем")
+                    is_running = False
+                    break
+
+                if not self.dao.board:
+                    print("Введите код доски: ")
+                    self.dao.board = await to_thread(input)
+
+                await self.aposting_thread()
+
+            except (ConnectionError, Timeout):
+                print(f"[{self.name}] Ошибка соеднинения\n"
+                      "Проверьте своё интернет соединение и попробуйте позже")
+
+            except ThreadNotFoundException as e:
+                print(f"[{self.name}] {e.message}")
+                is_running = False
+
+            except Exception as e:
+                self._print_error(e)
+
+            finally:
+                if not is_running:
+                    self.stop()
+                    return
+                await self.asleep(self.scheduler.next_interval())
+
+    @classmethod
+    async def run_all(cls, model_names: List[str]) -> None:
+        cls._print_loop_header()
+        cls._setup_logging()
+
+        await gather(*(cls(name).aloop() for name in model_names))
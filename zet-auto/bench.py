@@ -0,0 +1,59 @@
+from json import loads
+from time import perf_counter
+from typing import Callable, Iterable, List
+
+from api.recorder import TrafficRecord
+from handlers.comment_parser import CommentParser
+
+
+class Benchmarks:
+    @staticmethod
+    def _comments(records: Iterable[TrafficRecord]) -> List[str]:
+        comments = []
+
+        for record in records:
+            if record.status != 200 or record.kind == 'post':
+                continue
+
+            try:
+                data = loads(record.body)
+                posts = data['threads'][0]['posts'] if record.kind == 'full' else data['posts']
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+
+            comments += [p.get('comment') or '' for p in posts]
+
+        return comments
+
+    @staticmethod
+    def _time(func: Callable[[str], object], comments: List[str], repeat: int) -> float:
+        best = float('inf')
+
+        for _ in range(repeat):
+            start = perf_counter()
+            for comment in comments:
+                func(comment)
+            best = min(best, perf_counter() - start)
+
+        return best
+
+    @classmethod
+    def clean(cls, records: Iterable[TrafficRecord], repeat: int = 5) -> None:
+        comments = cls._comments(records)
+
+        if not comments:
+            print("No comments found")
+            return
+
+        mismatches = sum(
+            CommentParser.clean(comment) != CommentParser.clear(comment)
+            for comment in comments
+        )
+
+        clear_time = cls._time(CommentParser.clear, comments, repeat)
+        clean_time = cls._time(CommentParser.clean, comments, repeat)
+
+        print(f"Comments: {len(comments)} ({sum(map(len, comments))} chars)")
+        print(f"Mismatches: {mismatches}")
+        print(f"clear: {clear_time * 1e6 / len(comments):.2f} us/comment")
+        print(f"clean: {clean_time * 1e6 / len(comments):.2f} us/comment (x{clear_time / clean_time:.2f})")
@@ -9,9 +9,18 @@ def _getenv_bool(key: str, default_value: bool = False) -> bool:
     return getenv(key, str(default_value)).lower() in ("1", "true")
 
 
+def _getenv_int(key: str, default_value: int = 0) -> int:
+    return int(getenv(key, str(default_value)))
+
+
+def _getenv_float(key: str, default_value: float = 0.0) -> float:
+    return float(getenv(key, str(default_value)))
+
+
 class ConnectionConfig:
     USE_PROXY = _getenv_bool("USE_PROXY")
     PROXY = getenv("PROXY", None) if USE_PROXY else None
+    POOL_SIZE = _getenv_int("POOL_SIZE", 10)
 
 
 class Keys:
@@ -21,10 +30,38 @@ class Keys:
 
 
 class DvachConfig:
-    BASE_URL = "https://2ch.su"
+    BASE_URL = getenv("BASE_URL", "https://2ch.su")
 
 
 class AppConfig:
     MAKE_PEREKATS = _getenv_bool("MAKE_PEREKATS", False)
     READONLY = _getenv_bool("READONLY", False)
     SAVE_MAPS = _getenv_bool("SAVE_MAPS", False)
+    INCREMENTAL_FETCH = _getenv_bool("INCREMENTAL_FETCH", True)
+    DEBUG = _getenv_bool("DEBUG", False)
+    JOURNAL = _getenv_bool("JOURNAL", True)
+    SNAPSHOT_EVERY = _getenv_int("SNAPSHOT_EVERY", 1000)
+    INCREMENTAL_RENDER = _getenv_bool("INCREMENTAL_RENDER", True)
+
+
+class RetryConfig:
+    MAX_ATTEMPTS = _getenv_int("POST_MAX_ATTEMPTS", 5)
+    BASE_DELAY = _getenv_float("POST_BASE_DELAY", 5)
+    MAX_DELAY = _getenv_float("POST_MAX_DELAY", 60)
+    JITTER = _getenv_float("POST_JITTER", 0.5)
+    BREAKER_THRESHOLD = _getenv_int("BREAKER_THRESHOLD", 5)
+    BREAKER_COOLDOWN = _getenv_float("BREAKER_COOLDOWN", 300)
+    CONNECT_TIMEOUT = _getenv_float("CONNECT_TIMEOUT", 10)
+    READ_TIMEOUT = _getenv_float("READ_TIMEOUT", 60)
+
+
+class PollConfig:
+    MIN_INTERVAL = _getenv_float("POLL_MIN_INTERVAL", 5)
+    MAX_INTERVAL = _getenv_float("POLL_MAX_INTERVAL", 60)
+    JITTER = _getenv_float("POLL_JITTER", 0.1)
+
+
+class ParseConfig:
+    WORKERS = _getenv_int("PARSE_WORKERS", 0)
+    THRESHOLD = _getenv_int("PARSE_THRESHOLD", 200)
+    PROCESSES = _getenv_bool("PARSE_PROCESSES", True)
@@ -1,34 +1,40 @@
+from atexit import register as at_exit, unregister as at_exit_cancel
 from datetime import datetime
-from difflib import get_close_matches
 from logging import basicConfig, error as log_error, ERROR
 from time import sleep, perf_counter
 from traceback import print_tb
-from typing import List, Dict
+from typing import List
 
 from PIL import Image
 from requests import Response
-from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectionError, Timeout
 
 from api.models import Post, DvachThread, ImageFile
 from api.schemas import DvachPostingSchemaIn
 from api.handler import DvachAPIHandler
-from config import ConnectionConfig, Keys, AppConfig
+from api.retry_policy import CircuitBreaker, RetryPolicy, Verdict
+from config import ConnectionConfig, Keys, AppConfig, ParseConfig, PollConfig, RetryConfig
 from exceptions import ThreadNotSetException, ThreadNotFoundException
-from handlers.comment_parser import CommentParser
+from handlers.comment_parser import (
+    CommentParser, RollBaseMatch, RollMatch, ExpansionMatch, AttackMatch, TileTokens,
+)
+from handlers.map_renderer import MapRenderer
 from handlers.paste_handler import PasteHandler
+from handlers.poll_scheduler import PollScheduler
+from handlers.post_parser import PostIntent, PostParser, parse_post_intent
 from handlers.premod_handler import PremodHandler
 from handlers.resources_handler import ResourcesHandler
-from handlers.saves_handler import SavesHandler
 from model.dao import GameDataDAO
+from model.models import GameData
 
 
 class Controller:
-    def __init__(self, model_name: str) -> None:
+    def __init__(self, model_name: str, game_data: GameData | None = None, auto_approve: bool = False) -> None:
         self.name = model_name
-        self.dao = GameDataDAO(SavesHandler.load(model_name))
+        self.dao = GameDataDAO(game_data) if game_data else GameDataDAO.load(model_name, writable=AppConfig.JOURNAL)
         print(self.dao)
 
-        self.premod_handler = PremodHandler()
+        self.premod_handler = PremodHandler(auto_approve=auto_approve)
         self.paste_handler = PasteHandler()
         self.paste_handler.paste = self.dao.paste
 
@@ -38,12 +44,45 @@ class Controller:
             passcode_auth=Keys.PASSCODE_AUTH,
             use_proxy=ConnectionConfig.USE_PROXY,
             proxy=ConnectionConfig.PROXY,
+            pool_size=ConnectionConfig.POOL_SIZE,
+            timeout=(RetryConfig.CONNECT_TIMEOUT, RetryConfig.READ_TIMEOUT),
         )
 
         self.api.update_cookies(self.dao.cookies)  # оп галка теперь не должна теряться (?)
 
+        self.retry_policy = RetryPolicy(
+            max_attempts=RetryConfig.MAX_ATTEMPTS,
+            base_delay=RetryConfig.BASE_DELAY,
+            max_delay=RetryConfig.MAX_DELAY,
+            jitter=RetryConfig.JITTER,
+            breaker=CircuitBreaker(RetryConfig.BREAKER_THRESHOLD, RetryConfig.BREAKER_COOLDOWN),
+        )
+
+        self.scheduler = PollScheduler(
+            min_interval=PollConfig.MIN_INTERVAL,
+            max_interval=PollConfig.MAX_INTERVAL,
+            jitter=PollConfig.JITTER,
+        )
+
+        self.map_renderer = MapRenderer(incremental=AppConfig.INCREMENTAL_RENDER)
+
+        self.post_parser = PostParser(
+            workers=ParseConfig.WORKERS,
+            threshold=ParseConfig.THRESHOLD,
+            processes=ParseConfig.PROCESSES,
+        )
+        # воркеры пула не должны переживать процесс, как бы цикл ни завершился
+        at_exit(self.stop)
+
+        # тред, полученный в текущей итерации, и время последнего бампа по всем полученным постам
+        self._snapshot: DvachThread | None = None
+        self._last_bump: datetime | None = None
+
+        # num поста с номером dao.last_number - якорь для инкрементального получения треда
+        self._last_num: int | None = None
+
     def get_map_image(self) -> Image.Image:
-        return ResourcesHandler.draw_map(self.dao.players)
+        return self.map_renderer.render(self.dao.players)
 
     def get_players_image(self) -> Image.Image:
         return ResourcesHandler.draw_players(self.dao.players)
@@ -57,21 +96,23 @@ class Controller:
 
         return True
 
-    def add_tiles(self, roll_base_number: int, roll_number: int, tiles: List[str], roll_value: int) -> int:
+    def add_tiles(
+        self, roll_base_number: int, roll_number: int, tiles: List[str], roll_value: int,
+        invalid_tiles: List[str] | None = None,
+    ) -> int:
         if not self._pre_addition(roll_base_number, roll_number):
             return roll_value
 
         player = self.dao.get_player(rb_num=roll_base_number)
+        graph = ResourcesHandler.get_graph()
 
-        # check if tiles exists
-        for tile in tiles:
-            if not ResourcesHandler.tile_exists(tile):
-                tiles.remove(tile)
-                self.paste_handler.invalid_tile(roll_number, tile)
+        # несуществующие клетки отсеяны ещё при разборе ролла
+        for tile in invalid_tiles or []:
+            self.paste_handler.invalid_tile(roll_number, tile)
 
         # check if player owns tiles
         for tile in tiles:
-            if tile in player.tiles:
+            if self.dao.get_tile_owner(tile) is player:
                 _f = True
                 tiles.remove(tile)
                 self.paste_handler.already_owns(roll_number, tile)
@@ -80,14 +121,13 @@ class Controller:
             # if player has no tiles
             if not player.tiles:
                 for tile in tiles:
-                    attacked = self.dao.del_tile(tile)
+                    attacked = self.dao.add_tile(player, tile)
 
                     if not attacked:
                         self.paste_handler.creation(roll_number, tile, player.name)
                     else:
                         self.paste_handler.creation_attack(roll_number, tile, player.name, attacked)
 
-                    player.tiles.append(tile)
                     tiles.remove(tile)
                     roll_value -= 1
 
@@ -96,27 +136,23 @@ class Controller:
 
             # if player has tiles
             _f = False
-            player_tiles = set(player.tiles)
+            player_mask = graph.mask(player.tiles)
             for tile in tiles:
-                for route in ResourcesHandler.get_tile(tile).get('routes'):
-                    if route not in player_tiles:
-                        continue
+                if not graph.is_routed(graph.index[tile], player_mask):
+                    continue
 
-                    _f = True
-                    attacked = self.dao.del_tile(tile)
+                _f = True
+                attacked = self.dao.add_tile(player, tile)
 
-                    if not attacked:
-                        self.paste_handler.capture(roll_number, tile, player.name)
-                    else:
-                        self.paste_handler.capture_attack(roll_number, tile, player.name, attacked)
+                if not attacked:
+                    self.paste_handler.capture(roll_number, tile, player.name)
+                else:
+                    self.paste_handler.capture_attack(roll_number, tile, player.name, attacked)
 
-                    player.tiles.append(tile)
-                    tiles.remove(tile)
-                    roll_value -= 1
-                    break
+                tiles.remove(tile)
+                roll_value -= 1
+                break
 
-                if _f:
-                    break
             if _f:
                 continue
 
@@ -137,35 +173,14 @@ class Controller:
             self.paste_handler.expansion_without_tiles(roll_number)
             return roll_value
 
-        free_tiles: Dict[str, float] = {}
-        checked_tiles = []
-
         while roll_value > 0:
-            # getting nearby tiles
-            for tile in player.tiles:
-                if tile in checked_tiles:
-                    continue
-                checked_tiles.append(tile)
-
-                for routed in ResourcesHandler.get_tile(tile).get('routes'):
-                    if not self.dao.is_tile_free(routed):
-                        continue
-
-                    distance = ResourcesHandler.calc_distance(tile, routed)
-                    if not free_tiles.get(routed):
-                        free_tiles[routed] = distance
-                    else:
-                        free_tiles[routed] = min(free_tiles[routed], distance)
-
-            if not free_tiles:
+            # ближайшая свободная клетка на границе владений игрока
+            nearest = self.dao.get_nearest_free_tile(player)
+            if not nearest:
                 break
 
-            # getting key with min distance to player tiles
-            nearest = min(free_tiles, key=free_tiles.get)
-
-            player.tiles.append(nearest)
+            self.dao.add_tile(player, nearest)
             roll_value -= 1
-            free_tiles.__delitem__(nearest)
             self.paste_handler.capture(roll_number, nearest, player.name)
 
         if roll_value > 0:
@@ -184,45 +199,23 @@ class Controller:
             return roll_value
 
         # try to find the closest match in players' names
-        match = get_close_matches(attacked_name, [player.name for player in self.dao.players], 1)
-        if not match:
+        attacked = self.dao.get_closest_player(attacked_name)
+        if not attacked:
             self.paste_handler.against_no_matches(roll_number)
             return roll_value
 
         # check if attacked player has tiles
-        attacked = self.dao.get_player(name=match[0])
         if not attacked.tiles:
             self.paste_handler.against_no_tiles(roll_number, attacked.name)
             return roll_value
 
-        tiles: Dict[str, float] = dict()
-        checked_tiles = []
-
         while roll_value > 0:
-            for tile in attacking.tiles:
-                if tile in checked_tiles:
-                    continue
-                checked_tiles.append(tile)
-
-                for routed in ResourcesHandler.get_tile(tile).get('routes'):
-                    if routed not in attacked.tiles:
-                        continue
-
-                    distance = ResourcesHandler.calc_distance(tile, routed)
-                    if not tiles.get(routed):
-                        tiles[routed] = distance
-                    else:
-                        tiles[routed] = min(tiles[routed], distance)
-
-            if not tiles:
+            nearest = self.dao.get_nearest_enemy_tile(attacking, attacked)
+            if not nearest:
                 break
 
-            nearest = min(tiles, key=tiles.get)
-
-            attacking.tiles.append(nearest)
-            attacked.tiles.remove(nearest)
+            self.dao.add_tile(attacking, nearest)
             roll_value -= 1
-            tiles.__delitem__(nearest)
             self.paste_handler.capture_attack(roll_number, nearest, attacking.name, attacked.name)
 
         if roll_value > 0:
@@ -230,23 +223,18 @@ class Controller:
 
         return roll_value
 
-    def parse_roll_base(self, post: Post) -> bool:
-        data = CommentParser.parse_roll_base(post.comment)
-
-        if not data:
-            return False
-
+    def parse_roll_base(self, post: Post, data: RollBaseMatch) -> None:
         name, color = data
 
         # name length check
         if len(name) > 50:
             self.paste_handler.too_long_name(post.num)
-            return True
+            return
 
         # non-cyrillic symbols check
         if not CommentParser.contains_cyrillic_only(name):
             self.paste_handler.non_cyrillic(post.num)
-            return True
+            return
 
         # user moderation
         mod_answer, mod_reason = self.premod_handler.moderate(name)
@@ -255,7 +243,7 @@ class Controller:
                 self.paste_handler.black_listed_name(post.num)
             else:
                 self.paste_handler.creation_denied(post.num, mod_reason)
-            return True
+            return
 
         # after all checks
 
@@ -264,47 +252,38 @@ class Controller:
         if player:
             self.dao.add_roll_base(player, post.num)
             self.paste_handler.new_roll_base(post.num)
-            return True
+            return
 
         # ignore if player with same name exists
         if self.dao.check_player(name=name):
             self.paste_handler.same_name(post.num)
-            return True
+            return
 
         # or with same color
         if self.dao.check_player(color=color):
             self.paste_handler.same_color(post.num)
-            return True
+            return
 
         # creating new player
         player = self.dao.add_player(name, color)
         self.dao.add_roll_base(player, post.num)
         self.paste_handler.new_player(post.num)
 
-        return True
-
-    def parse_roll(self, post: Post, roll_value: int) -> int:
-        data = CommentParser.parse_roll(post.comment)
-
+    def parse_roll(self, post: Post, data: RollMatch | None, tiles: TileTokens, roll_value: int) -> int:
         if not data:
             return roll_value
 
-        roll_base_number, tiles = data
-        roll_value = self.add_tiles(roll_base_number, post.num, tiles, roll_value)
+        roll_value = self.add_tiles(data.roll_base, post.num, tiles.tiles, roll_value, tiles.invalid)
         return roll_value
 
-    def parse_roll_neutral(self, post: Post, roll_value: int) -> int:
-        rb_num = CommentParser.parse_roll_on_neutral(post.comment)
-
-        if not rb_num:
+    def parse_roll_neutral(self, post: Post, data: ExpansionMatch | None, roll_value: int) -> int:
+        if not data or not data.roll_base:
             return roll_value
 
-        roll_value = self.add_tiles_neutral(rb_num, post.num, roll_value)
+        roll_value = self.add_tiles_neutral(data.roll_base, post.num, roll_value)
         return roll_value
 
-    def parse_roll_against(self, post: Post, roll_value: int) -> int:
-        data = CommentParser.parse_roll_against(post.comment)
-
+    def parse_roll_against(self, post: Post, data: AttackMatch | None, roll_value: int) -> int:
         if not data:
             return roll_value
 
@@ -313,28 +292,32 @@ class Controller:
         return roll_value
 
     def parse_post(self, post: Post) -> None:
-        post.comment = CommentParser.clear(post.comment)
+        self.apply_post(post, parse_post_intent(post.num, post.comment))
+
+    def apply_post(self, post: Post, intent: PostIntent) -> None:
+        post.comment = intent.comment
+        parsed, roll_value = intent.parsed, intent.roll_value
 
-        if self.parse_roll_base(post):
+        if parsed.roll_base:
+            self.parse_roll_base(post, parsed.roll_base)
             return
 
-        roll_value = CommentParser.get_roll_value(post.num)
         if roll_value <= 0:
             return
 
         self.paste_handler.add_line()
 
-        roll_value = self.parse_roll(post, roll_value)
+        roll_value = self.parse_roll(post, parsed.roll, intent.tiles, roll_value)
         if roll_value <= 0:
             self.paste_handler.add_line()
             return
 
-        roll_value = self.parse_roll_neutral(post, roll_value)
+        roll_value = self.parse_roll_neutral(post, parsed.expansion, roll_value)
         if roll_value <= 0:
             self.paste_handler.add_line()
             return
 
-        roll_value = self.parse_roll_against(post, roll_value)
+        roll_value = self.parse_roll_against(post, parsed.attack, roll_value)
 
         if roll_value <= 0:
             self.paste_handler.add_line()
@@ -344,48 +327,92 @@ class Controller:
         self.paste_handler.add_line()
 
     def parse_thread(self, thread: DvachThread) -> None:
+        posts = []
+
         for post in thread.posts:
-            if post.number <= self.dao.last_number:
+            if post.number < self.dao.last_number:
+                continue
+
+            if post.number == self.dao.last_number:
+                self._last_num = post.num
                 continue
 
             if post.number > 500:  # hardcoded bump limit
                 break
 
-            self.parse_post(post)
+            posts.append(post)
+
+        # разбор комментариев не трогает состояние игры и может идти параллельно,
+        # а применяется строго по порядку постов
+        intents = self.post_parser.parse(posts)
+
+        for post, intent in zip(posts, intents):
+            self.apply_post(post, intent)
             self.dao.last_number = post.number
+            self._last_num = post.num
 
-    def _posting(self, schema: DvachPostingSchemaIn, name: str) -> Response | None:
+    def _posting_allowed(self, name: str) -> bool:
         if AppConfig.READONLY:
             print("отмена постинга - сидим в ридонли")
-            return None
+            return False
 
-        c, result = 5, 0
-        r = None
+        if not self.retry_policy.allow():
+            print(f"отмена постинга ({name}) - борда сбоит, пауза ещё "
+                  f"{int(self.retry_policy.breaker.remaining())} с.")
+            return False
 
-        while not result and c:
-            r = self.api.post_posting(schema)
-            result = r.json().get("result")
-            c -= 1
-            print(r, r.json())
-            if not result:
-                self.sleep(5)
+        return True
 
-        if not result:
-            print(f"!!! {name} - провалено !!!")
-        else:
+    def _posting_attempt(self, r: Response | None, error: Exception | None, name: str, attempt: int) -> Verdict:
+        verdict, reason = self.retry_policy.classify(r, error)
+        self.retry_policy.record(verdict)
+
+        if verdict is Verdict.OK:
             print(f"{name} - ок")
+            self.scheduler.posted()
+            self.invalidate_snapshot()
+        elif self.retry_policy.should_retry(verdict, attempt):
+            print(f"{name} - попытка {attempt + 1} не удалась: {reason}")
+        else:
+            print(f"!!! {name} - провалено: {reason} !!!")
 
-        return r
+        return verdict
 
-    def posting_bump(self) -> None:
-        schema = DvachPostingSchemaIn(
+    def _posting(self, schema: DvachPostingSchemaIn, name: str) -> Response | None:
+        if not self._posting_allowed(name):
+            return None
+
+        attempt = 0
+
+        while True:
+            r, error = None, None
+            try:
+                r = self.api.post_posting(schema)
+            except (ConnectionError, Timeout) as e:
+                error = e
+
+            verdict = self._posting_attempt(r, error, name, attempt)
+
+            if verdict is Verdict.OK:
+                return r
+
+            if not self.retry_policy.should_retry(verdict, attempt):
+                return None
+
+            self.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    def _bump_schema(self) -> DvachPostingSchemaIn:
+        return DvachPostingSchemaIn(
             board=self.dao.board,
             thread=self.dao.thread,
             comment='Бамп',
         )
-        self._posting(schema, 'Бамп')
 
-    def posting_post(self) -> None:
+    def posting_bump(self) -> None:
+        self._posting(self._bump_schema(), 'Бамп')
+
+    def _post_schema(self) -> DvachPostingSchemaIn:
         draw_players = len(self.dao.players) > 0
 
         map_image = self.get_map_image()
@@ -408,18 +435,19 @@ class Controller:
                 ImageFile(name='map.png', image=map_image),
             ]
 
-        schema = DvachPostingSchemaIn(
+        return DvachPostingSchemaIn(
             board=self.dao.board,
             thread=self.dao.thread,
             comment=self.paste_handler.paste,
             files=files,
         )
 
-        r = self._posting(schema, 'Постинг')
+    def posting_post(self) -> None:
+        r = self._posting(self._post_schema(), 'Постинг')
         if r:
             del self.paste_handler.paste
 
-    def posting_thread(self) -> None:
+    def _thread_schema(self) -> DvachPostingSchemaIn:
         del self.dao.empty_players
         del self.dao.roll_bases
 
@@ -427,19 +455,22 @@ class Controller:
         if self.dao.players:
             files.append(ImageFile(name='players.png', image=self.get_players_image()))
 
-        data = DvachPostingSchemaIn(
+        return DvachPostingSchemaIn(
             board=self.dao.board,
             comment=ResourcesHandler.get_op_post(),
             files=files,
         )
 
-        r = self._posting(data, 'Создание треда')
-
-        if not r:
-            return
-
-        self.dao.thread = r.json().get('thread')
+    def start_thread(self, thread_num: str | int) -> None:
+        # новый тред: счёт постов, якорь инкрементального получения и расписание опроса с нуля
+        self.dao.thread = str(thread_num)
         self.dao.last_number = 1
+        self._last_num = None
+        self.scheduler.reset()
+        self._last_bump = None
+
+    def _thread_posted(self, r: Response) -> None:
+        self.start_thread(r.json().get('thread'))
         # TODO: использовать номер поста на доске вместо номера в треде (на чистки удаления половины треда ув. чмодами)
 
         cookies, d = r.cookies, dict()
@@ -447,34 +478,73 @@ class Controller:
             if cookie.name[:2] == 'op':
                 d.update({cookie.name: cookie.value})
         self.api.update_cookies(d)
-        self.dao.cookies.update(d)
+        self.dao.update_cookies(d)
 
-    def posting_announcement(self, thread_num: str | int) -> None:
+    def posting_thread(self) -> None:
+        r = self._posting(self._thread_schema(), 'Создание треда')
+
+        if not r:
+            return
+
+        self._thread_posted(r)
+
+    def _announcement_schema(self, thread_num: str | int) -> DvachPostingSchemaIn:
         new_thread_link = self.dao.link
-        schema = DvachPostingSchemaIn(
+        return DvachPostingSchemaIn(
             board=self.dao.board,
             thread=thread_num,
             comment=f"***{new_thread_link * 3}***",
         )
-        self._posting(schema, 'Анонс переката')
 
-    def fetch_thread(self) -> DvachThread | None:
-        return self.api.get_thread(self.dao.board, self.dao.thread)
+    def posting_announcement(self, thread_num: str | int) -> None:
+        self._posting(self._announcement_schema(thread_num), 'Анонс переката')
+
+    def _is_increment_valid(self, thread: DvachThread | None) -> bool:
+        # якорный пост должен быть на месте, иначе тред почистили и нумерация поехала
+        return bool(
+            thread and thread.posts
+            and thread.posts[0].num == self._last_num
+            and thread.posts[0].number == self.dao.last_number
+        )
+
+    def fetch_thread(self, incremental: bool = AppConfig.INCREMENTAL_FETCH) -> DvachThread | None:
+        # декодируем начиная с последнего обработанного поста - он служит якорем
+        after = self.dao.last_number - 1
 
-    def check_drowning(self) -> bool:
-        thread = self.fetch_thread()
+        if incremental and self._last_num:
+            thread = self.api.get_thread_after(self.dao.board, self.dao.thread, self._last_num, after)
+            if self._is_increment_valid(thread):
+                return thread
 
-        for post in thread.posts[::-1]:
-            if post.sage:
-                continue
+            print("Не удалось получить только новые посты, получаем тред целиком...")
+
+        return self.api.get_thread(self.dao.board, self.dao.thread, after)
+
+    def _remember_snapshot(self, thread: DvachThread | None) -> None:
+        self._snapshot = thread
+
+        if thread and thread.last_bump and (not self._last_bump or thread.last_bump > self._last_bump):
+            self._last_bump = thread.last_bump
+
+    def snapshot(self) -> DvachThread | None:
+        if self._snapshot is None:
+            self._remember_snapshot(self.fetch_thread())
+        return self._snapshot
+
+    def invalidate_snapshot(self) -> None:
+        self._snapshot = None
+
+    @staticmethod
+    def is_drowning(last_bump: datetime | None) -> bool:
+        if not last_bump:
+            return False
 
-            post_time = post.datetime.split()
-            post_time = post_time[0] + ' ' + post_time[2]
-            post_time = datetime.strptime(post_time, "%d/%m/%y %H:%M:%S")
-            delta = datetime.now() - post_time
-            return delta.seconds >= 60  # hardcoded bumps timeout
+        delta = datetime.now() - last_bump
+        return delta.seconds >= 60  # hardcoded bumps timeout
 
-        return False
+    def check_drowning(self) -> bool:
+        self.snapshot()
+        return self.is_drowning(self._last_bump)
 
     def check_bump_limit(self) -> bool:
         if not self.dao.last_number >= 500:  # hardcoded bump limit
@@ -499,7 +569,7 @@ class Controller:
         return True
 
     @staticmethod
-    def sleep(timeout: int = 10) -> None:
+    def sleep(timeout: float = 10) -> None:
         start_time = perf_counter()
         passed = perf_counter() - start_time
 
@@ -510,27 +580,38 @@ class Controller:
 
         print()
 
+    def _print_paste(self) -> None:
+        print(f"{f'  паста  ':*^60}")
+        print(self.paste_handler.paste)
+        print('*' * 60)
+
+    def _parse_fetched(self, thread: DvachThread | None) -> None:
+        if not thread:
+            print("Тред не найден, отвал руля...")
+            # self.posting_thread()
+            raise ThreadNotFoundException
+
+        if thread.modified:
+            self.scheduler.observe(thread.posts)
+
+            print("Парсим тред...")
+            self.parse_thread(thread)
+        else:
+            print("Тред не изменился, парсинг пропущен")
+
     def loop_iter(self) -> None:
         if not self.dao.board or not self.dao.thread:
             raise ThreadNotSetException
 
         print(f"{f'  {datetime.now()}  ':=^80}")
 
-        print("Получаем тред...")
-        thread = self.fetch_thread()
-
-        if not thread:
-            print("Тред не найден, отвал руля...")
-            # self.posting_thread()
-            raise ThreadNotFoundException
+        self.invalidate_snapshot()
 
-        print("Парсим тред...")
-        self.parse_thread(thread)
+        print("Получаем тред...")
+        self._parse_fetched(self.snapshot())
 
         if self.paste_handler.paste:
-            print(f"{f'  паста  ':*^60}")
-            print(self.paste_handler.paste)
-            print('*' * 60)
+            self._print_paste()
 
             print("Постим карту...")
             self.posting_post()
@@ -547,11 +628,13 @@ class Controller:
             self.posting_bump()
             return
 
-    def loop(self) -> None:
-        print(f"\n{'':*^50}")
-        print(f"{' CTRL+C для выхода из лупа ':*^50}")
-        print(f"{'':*^50}\n")
+    def save(self) -> None:
+        print("Сохраняем модель...")
+        self.dao.paste = self.paste_handler.paste
+        self.dao.save(self.name)
 
+    @staticmethod
+    def _setup_logging() -> None:
         basicConfig(
             level=ERROR,
             filename=str(__file__).replace("controller.py", "errors.log"),
@@ -559,14 +642,40 @@ class Controller:
             format="%(asctime)s %(levelname)s %(message)s",
         )
 
+    @staticmethod
+    def _print_loop_header() -> None:
+        print(f"\n{'':*^50}")
+        print(f"{' CTRL+C для выхода из лупа ':*^50}")
+        print(f"{'':*^50}\n")
+
+    @staticmethod
+    def _print_error(e: Exception) -> None:
+        print('\n' + '=' * 50)
+        print(f"!!!{' ПРОИЗОШЛА ЧУДОВИЩНАЯ ОШИБКА ': ^44}!!!")
+        print(f"!!!{' КЛОЗЕТ ЗАБИЛСЯ ': ^44}!!!")
+        print(f"!!!{' ПОВТОРЯЮ КЛОЗЕТ ЗАБИЛСЯ ': ^44}!!!")
+        print('=' * 50 + '\n')
+
+        print(e)
+        print_tb(e.__traceback__)
+        print()
+        log_error(e, exc_info=True)
+
+    def stop(self) -> None:
+        # после остановки хук больше не нужен, иначе в симуляторе их копится по одному на контроллер
+        at_exit_cancel(self.stop)
+        self.post_parser.close()
+
+    def loop(self) -> None:
+        self._print_loop_header()
+        self._setup_logging()
+
         is_running = True
 
         while is_running:
             try:
                 self.loop_iter()
-                print("Сохраняем модель...")
-                self.dao.paste = self.paste_handler.paste
-                SavesHandler.dump(self.name, self.dao.model)
+                self.save()
 
             except ThreadNotSetException as e:
                 print(e.message)
@@ -584,7 +693,7 @@ class Controller:
 
                 self.posting_thread()
 
-            except ConnectionError:
+            except (ConnectionError, Timeout):
                 print("Ошибка соеднинения\n"
                       "Проверьте своё интернет соединение и попробуйте позже")
 
@@ -597,18 +706,10 @@ class Controller:
                 is_running = False
 
             except Exception as e:
-                print('\n' + '=' * 50)
-                print(f"!!!{' ПРОИЗОШЛА ЧУДОВИЩНАЯ ОШИБКА ': ^44}!!!")
-                print(f"!!!{' КЛОЗЕТ ЗАБИЛСЯ ': ^44}!!!")
-                print(f"!!!{' ПОВТОРЯЮ КЛОЗЕТ ЗАБИЛСЯ ': ^44}!!!")
-                print('=' * 50 + '\n')
-
-                print(e)
-                print_tb(e.__traceback__)
-                print()
-                log_error(e, exc_info=True)
+                self._print_error(e)
 
             finally:
                 if not is_running:
+                    self.stop()
                     return
-                self.sleep()
+                self.sleep(self.scheduler.next_interval())
@@ -13,3 +13,19 @@ class ThreadNotFoundException(Exception):
         if message:
             self.message += f": {message}"
         super().__init__(self.message)
+
+
+class TileOwnersMismatchException(Exception):
+    def __init__(self, message=''):
+        self.message = "Индекс владельцев клеток разошёлся с игроками"
+        if message:
+            self.message += f": {message}"
+        super().__init__(self.message)
+
+
+class RenderMismatchException(Exception):
+    def __init__(self, message=''):
+        self.message = "Инкрементальная отрисовка карты разошлась с полной"
+        if message:
+            self.message += f": {message}"
+        super().__init__(self.message)
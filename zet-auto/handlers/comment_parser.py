@@ -1,171 +1,237 @@
 from html import unescape
-from re import compile, match, search, findall, sub, IGNORECASE
-from typing import List, Tuple
+from re import compile, sub, IGNORECASE
+from sys import intern
+from typing import Dict, Iterable, List, NamedTuple
 
+from handlers.resources_handler import ResourcesHandler
 
-class CommentParser:
-    @staticmethod
-    def clear(comment: str) -> str:
-        comment = sub(r'<br>', '\n', comment)
-        comment = sub(r'<.+?>', '', comment)
-        comment = unescape(comment)
-        return comment
 
-    @staticmethod
-    def _cyrillic_to_roman(s: str) -> str:
-        cyrillic = {
-            'а': 'a',
-            'б': 'b',
-            'в': 'b',
-            'с': 'c',
-            'ц': 'c',
-            'д': 'd',
-            'е': 'e',
-            'ф': 'f',
-        }
-
-        for key in cyrillic:
-            s = s.replace(key, cyrillic[key])
+class RollBaseMatch(NamedTuple):
+    name:  str
+    color: str
 
-        return s
 
-    @classmethod
-    def parse_roll_base(cls, comment: str) -> Tuple[str, str] | None:
-        pattern = compile(
-            r"(рол{1,10}база|rol{1,10}base)\s*?\n(.+?)\s*?\n#?([a-fA-F0-9]{6})",
-            flags=IGNORECASE,
-        )
+class RollMatch(NamedTuple):
+    roll_base: int
+    tiles:     str  # сырая строка клеток, см. CommentParser.tokenize_tiles
 
-        r = search(pattern, comment)
 
-        if not r:
-            return None
+class ExpansionMatch(NamedTuple):
+    roll_base: int
 
-        name = r.group(2)         # "(.+?)"
-        color = f"#{r.group(3)}"  # "#?([a-fA-F0-9]{6})"
 
-        return name, cls._cyrillic_to_roman(color.lower())
+class AttackMatch(NamedTuple):
+    roll_base: int
+    name:      str
 
-    @classmethod
-    def parse_roll(cls, comment: str) -> Tuple[int, List[str]] | None:
-        pattern = compile(
-            r"(^|\n)>>(\d+?)\s*\n[^\n]*?(rol|рол)[^\n]*?((\d+[a-zа-я]* ?)+)",
-            flags=IGNORECASE,
-        )
 
-        r = search(pattern, comment)
+class TileTokens(NamedTuple):
+    tiles:   List[str]  # существующие клетки, без повторов
+    invalid: List[str]  # токены, которых нет на карте
 
-        if not r:
-            return None
 
-        num = r.group(2)    # >>(\d+?)
-        tiles = r.group(4)  # ((\d+[a-zа-я]* ?)+)
+class ParsedComment(NamedTuple):
+    roll_base: RollBaseMatch | None = None
+    roll:      RollMatch | None = None
+    expansion: ExpansionMatch | None = None
+    attack:    AttackMatch | None = None
 
-        # tiles string processing
 
-        tiles = tiles.lower()                   # "2B 3Ф" -> "2b 3ф"
-        tiles = cls._cyrillic_to_roman(tiles)  # "2b 3ф" -> "2b 3f"
-        tiles = tiles.split()                   # "2b 3f" -> ["2b", "3f"]
+# за один проход ищутся и роллбаза, и заголовки роллов ">>N\n...ролл...".
+# строка ролла захватывается лукэхедом, чтобы роллбаза внутри неё тоже нашлась
+_CLASSIFIER = compile(
+    r"(?:рол{1,10}база|rol{1,10}base)\s*?\n(?P<name>.+?)\s*?\n#?(?P<color>[a-fA-F0-9]{6})"
+    r"|(?:^|\n)>>(?P<rb>\d+)\s*\n(?=[^\n]*?(?:rol|рол)(?P<tail>[^\n]*))",
+    flags=IGNORECASE,
+)
+# дальше проверяется только остаток строки ролла после первого "рол"
+_TILES = compile(r"(?:\d+[a-zа-я]* ?)+", flags=IGNORECASE)
+_EXPANSION = compile(r"расширение|покрас|expan[ds]", flags=IGNORECASE)
+_AGAINST = compile(r"(?:против|against) ([а-я ]{1,50})", flags=IGNORECASE)
 
-        # ["1a2b3cd"] -> ["1a", "2b", "3cd"]
-        i = 0
-        while i < len(tiles):
-            r = findall(r"\d+[a-z]+", tiles[i])
+_TILE_GROUPS = compile(r"(\d+)([a-z]+)")
 
-            if len(r) <= 1:
-                i += 1
-                continue
+_ROMAN = str.maketrans({
+    'а': 'a',
+    'б': 'b',
+    'в': 'b',
+    'с': 'c',
+    'ц': 'c',
+    'д': 'd',
+    'е': 'e',
+    'ф': 'f',
+})
 
-            tiles.pop(i)
-            for s in r:
-                tiles.insert(i, s)
-                i += 1
+# id клеток - номер и буква (или только номер), так что префиксное дерево
+# в два уровня: номер -> буква ("" у клеток без буквы) -> id
+_TILE_TRIE: Dict[str, Dict[str, str]] = {}
+for _tile_id in ResourcesHandler.get_tile_ids():
+    _number = _tile_id.rstrip('abcdefghijklmnopqrstuvwxyz')
+    _TILE_TRIE.setdefault(_number, {})[_tile_id[len(_number):]] = intern(_tile_id)
 
-        # ["1abc"] -> ["1a", "1b", "1c"]
-        i = 0
-        while i < len(tiles):
-            r = match(r"(\d+)([a-zA-Z]{2,})", tiles[i])
+def _roll_value(num: str) -> int:
+    vals = {
+        1: 0,
+        2: 1,
+        3: 3,
+        4: 5,
+        5: 8,
+    }
+    # add values for sixtiple and above if needed
 
-            if not r:
-                i += 1
-                continue
+    n = len(num)
+
+    if n >= 5 and num[-5] == num[-4] != num[-3] == num[-2] == num[-1]:
+        return 4  # 11999 (2+3)
+    if n >= 5 and num[-5] == num[-4] == num[-3] != num[-2] == num[-1]:
+        return 4  # 11199 (3+2)
+    if n >= 4 and num[-4] == num[-3] != num[-2] == num[-1]:
+        return 2  # 1199  (2+2)
+
+    c = 1
+    while c < n and num[-c] == num[-c - 1]:
+        c += 1
+
+    return vals.get(c, vals[5])
+
+
+# значение ролла определяется последними пятью цифрами номера: спецкомбинации
+# занимают не больше пяти, а серия из пяти и больше одинаковых стоит столько же.
+# для номеров короче пяти цифр ведущих нулей нет, поэтому у них своя таблица
+_ROLL_VALUES_SHORT = bytes(_roll_value(str(i)) for i in range(10000))
+_ROLL_VALUES = bytes(_roll_value(f"{i:05d}") for i in range(100000))
+
+# то же, что "<.+?>" в clear: тег не пересекает перевод строки
+_TAGS = compile(r'<[^\n][^\n>]*>')
+
+# почти все сущности на борде из этого набора, их быстрее заменить руками
+_ENTITIES = (('&gt;', '>'), ('&lt;', '<'), ('&quot;', '"'), ('&#39;', "'"))
+
+
+def _unescape(s: str) -> str:
+    if '&' not in s:
+        return s
 
-            tiles.pop(i)
-            for s in [r.group(1) + c for c in r.group(2)]:
-                tiles.insert(i, s)
-                i += 1
+    r = s
+    for entity, char in _ENTITIES:
+        r = r.replace(entity, char)
 
-        # duplicates clearing
-        result = []
-        [result.append(tile) for tile in tiles if tile not in result]
+    # &amp; заменяется последним, чтобы "&amp;gt;" не превратился в ">".
+    # если остались другие сущности - отдаём всё html.unescape
+    left = r.count('&')
+    if not left:
+        return r
+    if left == r.count('&amp;'):
+        return r.replace('&amp;', '&')
+    return unescape(s)
 
-        return int(num), result
 
+_NON_CYRILLIC = compile(r"[^а-я\s]", flags=IGNORECASE)
+
+
+class CommentParser:
     @staticmethod
-    def parse_roll_on_neutral(comment: str) -> int | None:
-        pattern = compile(
-            r"(\n|^)>>(\d+?)\s*\n[^\n]*?(rol|рол)[^\n]*?"
-            r"(расширение|покрас|expan[ds])",
-            flags=IGNORECASE
-        )
-        r = search(pattern, comment)
-        if not r:
-            return
-        return int(r.group(2))
+    def clear(comment: str) -> str:
+        comment = sub(r'<br>', '\n', comment)
+        comment = sub(r'<.+?>', '', comment)
+        comment = unescape(comment)
+        return comment
 
     @staticmethod
-    def parse_roll_against(comment: str) -> Tuple[int, str] | None:
-        pattern = compile(
-            r"(\n|^)>>(\d+?)\s*\n[^\n]*?(rol|рол)[^\n]*?"
-            r"(против|against) ([а-я ]{1,50})",
-            flags=IGNORECASE
-        )
-        r = search(pattern, comment)
-        if not r:
-            return
+    def clean(comment: str) -> str:
+        return _unescape(_TAGS.sub('', comment.replace('<br>', '\n')))
 
-        num = int(r.group(2))  # >>(\d+?)
-        name = r.group(5)      # ([а-я ]{1,50})
+    @staticmethod
+    def _cyrillic_to_roman(s: str) -> str:
+        return s.translate(_ROMAN)
 
-        return num, name
+    @classmethod
+    def classify(cls, comment: str) -> ParsedComment | None:
+        roll = expansion = attack = None
 
-    @staticmethod
-    def get_roll_value(num: int | str) -> int:
+        for r in _CLASSIFIER.finditer(comment):
+            # роллбаза важнее любых роллов в том же посте
+            if r.group('color'):
+                name = r.group('name')
+                color = f"#{r.group('color')}"
+                return ParsedComment(roll_base=RollBaseMatch(name, cls._cyrillic_to_roman(color.lower())))
 
-        vals = {
-            1: 0,
-            2: 1,
-            3: 3,
-            4: 5,
-            5: 8,
-        }
-        # add values for sixtiple and above if needed
+            if roll and expansion and attack:
+                continue
+
+            rb_num, tail = int(r.group('rb')), r.group('tail')
+
+            if not roll and (t := _TILES.search(tail)):
+                roll = RollMatch(rb_num, t.group())
 
-        specials = {
-            compile(r"^.*?((\d)\2(?!\2))((\d)(\4{2}))$"): 4,  # 11999 (2+3)
-            compile(r"^.*?((\d)\2{2}(?!\2))((\d)(\4))$"): 4,  # 11199 (3+2)
-            compile(r"^.*?((\d)\2(?!\2))((\d)(\4))$"):    2,  # 1199  (2+2)
-        }
+            if not expansion and _EXPANSION.search(tail):
+                expansion = ExpansionMatch(rb_num)
+
+            if not attack and (t := _AGAINST.search(tail)):
+                attack = AttackMatch(rb_num, t.group(1))
+
+        if not roll and not expansion and not attack:
+            return None
 
-        num = str(num)
+        return ParsedComment(roll=roll, expansion=expansion, attack=attack)
 
-        for pattern in specials:
-            if match(pattern, num):
-                return specials[pattern]
+    @staticmethod
+    def tokenize_tiles(tiles: str) -> TileTokens:
+        result, invalid, seen = [], [], set()
+
+        def add(number: str, letter: str) -> None:
+            token = number + letter
+            if token in seen:
+                return
+            seen.add(token)
+
+            tile = _TILE_TRIE.get(number, {}).get(letter)
+            if tile:
+                result.append(tile)
+            else:
+                invalid.append(token)
+
+        # "2B 3Ф" -> "2b 3f"
+        for token in tiles.lower().translate(_ROMAN).split():
+            groups = _TILE_GROUPS.findall(token)
+
+            # "1a2b3cd" -> "1a", "2b", "3c", "3d"
+            if len(groups) > 1:
+                for number, letters in groups:
+                    for letter in letters:
+                        add(number, letter)
+                continue
 
-        num = num[::-1]
+            # "1abc" -> "1a", "1b", "1c"; хвост после букв отбрасывается
+            if groups and len(groups[0][1]) > 1 and token.startswith(''.join(groups[0])):
+                number, letters = groups[0]
+                for letter in letters:
+                    add(number, letter)
+                continue
 
-        c = 1
-        while c < len(num) and num[c - 1] == num[c]:
-            c += 1
+            # остальное ("1a", "12", "1a2") целиком
+            if groups and token == ''.join(groups[0]):
+                add(*groups[0])
+            else:
+                add(token, '')
 
-        val = vals.get(c)
+        return TileTokens(result, invalid)
 
-        if val is not None:
-            return val
+    @staticmethod
+    def get_roll_value(num: int | str) -> int:
+        num = int(num)
+        if num < 10000:
+            return _ROLL_VALUES_SHORT[num]
+        return _ROLL_VALUES[num % 100000]
 
-        return vals[5]
+    @staticmethod
+    def get_roll_values(nums: Iterable[int | str]) -> List[int]:
+        short, values = _ROLL_VALUES_SHORT, _ROLL_VALUES
+        return [
+            short[num] if num < 10000 else values[num % 100000]
+            for num in map(int, nums)
+        ]
 
     @staticmethod
     def contains_cyrillic_only(s: str) -> bool:
-        return not search(r'[^а-я\s]', s, flags=IGNORECASE)
+        return not _NON_CYRILLIC.search(s)
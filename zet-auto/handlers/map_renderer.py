@@ -0,0 +1,66 @@
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageChops
+
+from config import AppConfig
+from exceptions import RenderMismatchException
+from handlers.resources_handler import ResourcesHandler
+from model.models import Player
+
+
+# карта, которая помнит последний отрисованный кадр и владельцев клеток на нём.
+# области клеток на чистой карте не пересекаются, так что перерисовываются
+# по маскам только клетки, сменившие цвет
+class MapRenderer:
+    def __init__(self, incremental: bool = True) -> None:
+        self.incremental = incremental
+
+        self._frame: Image.Image | None = None
+        self._colors: Dict[str, Tuple[int, int, int]] = {}
+
+    def reset(self) -> None:
+        self._frame = None
+        self._colors = {}
+
+    @staticmethod
+    def _colors_of(players: List[Player]) -> Dict[str, Tuple[int, int, int]]:
+        return {
+            tile_id: tuple(player.color_rgb)
+            for player in players
+            for tile_id in player.tiles
+            if ResourcesHandler.tile_exists(tile_id)
+        }
+
+    def render(self, players: List[Player], full: bool = False) -> Image.Image:
+        colors = self._colors_of(players)
+
+        if full or not self.incremental or self._frame is None:
+            self._frame = ResourcesHandler.draw_map(players)
+        else:
+            self._repaint(colors)
+
+        self._colors = colors
+
+        if AppConfig.DEBUG:
+            self.verify(players)
+
+        return self._frame.copy()
+
+    def _repaint(self, colors: Dict[str, Tuple[int, int, int]]) -> None:
+        base = ResourcesHandler.get_map()
+
+        for tile_id in self._colors.keys() | colors.keys():
+            color = colors.get(tile_id)
+            if color == self._colors.get(tile_id):
+                continue
+
+            box, mask = ResourcesHandler.get_tile_mask(tile_id)
+            if color:
+                self._frame.paste(color, box, mask)
+            else:
+                self._frame.paste(base.crop(box), box, mask)
+
+    def verify(self, players: List[Player]) -> None:
+        box = ImageChops.difference(self._frame, ResourcesHandler.draw_map(players)).getbbox()
+        if box:
+            raise RenderMismatchException(f"{box}")
@@ -0,0 +1,64 @@
+from collections import deque
+from random import uniform
+from time import perf_counter
+from typing import Deque, List
+
+from api.models import Post
+
+
+class PollScheduler:
+    def __init__(self, min_interval: float, max_interval: float, jitter: float = 0.0, window: int = 20) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+        # время (по часам борды) последних увиденных постов
+        self._times: Deque[float] = deque(maxlen=window)
+        self._last_number = 0
+        self._last_seen_at: float | None = None
+
+        self._repoll = False
+
+    def observe(self, posts: List[Post]) -> None:
+        for post in posts:
+            if post.number <= self._last_number:
+                continue
+
+            self._last_number = post.number
+            self._times.append(post.parsed_datetime.timestamp())
+            self._last_seen_at = perf_counter()
+
+    def posted(self) -> None:
+        self._repoll = True
+
+    def reset(self) -> None:
+        self._times.clear()
+        self._last_number = 0
+        self._last_seen_at = None
+
+    def rate(self) -> float:
+        if not self._times:
+            return 0.0
+
+        # тишина с момента последнего увиденного поста тоже идёт в окно, иначе
+        # умерший тред так и считался бы горячим. меряем её по своим часам,
+        # чтобы не зависеть от часового пояса борды
+        span = self._times[-1] - self._times[0] + perf_counter() - self._last_seen_at
+
+        if span <= 0:
+            return 0.0
+
+        return len(self._times) / span
+
+    def next_interval(self) -> float:
+        if self._repoll:
+            self._repoll = False
+            return 0.0
+
+        rate = self.rate()
+        interval = 1 / rate if rate else self.max_interval
+
+        if self.jitter:
+            interval *= uniform(1 - self.jitter, 1 + self.jitter)
+
+        return min(max(interval, self.min_interval), self.max_interval)
@@ -0,0 +1,59 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, NamedTuple
+
+from api.models import Post
+from handlers.comment_parser import CommentParser, ParsedComment, TileTokens
+
+
+class PostIntent(NamedTuple):
+    comment:    str
+    parsed:     ParsedComment
+    roll_value: int
+    tiles:      TileTokens  # уже разобранные клетки ролла, пусто если ролла нет
+
+
+# без состояния и на уровне модуля, чтобы её можно было отдать в пул процессов
+def parse_post_intent(num: int, comment: str) -> PostIntent:
+    text = CommentParser.clean(comment)
+    parsed = CommentParser.classify(text) or ParsedComment()
+
+    # у роллбазы значение ролла не считается
+    roll_value = 0 if parsed.roll_base else CommentParser.get_roll_value(num)
+
+    tiles = TileTokens([], [])
+    if parsed.roll and roll_value > 0:
+        tiles = CommentParser.tokenize_tiles(parsed.roll.tiles)
+
+    return PostIntent(text, parsed, roll_value, tiles)
+
+
+class PostParser:
+    def __init__(self, workers: int = 0, threshold: int = 200, processes: bool = True) -> None:
+        self.workers = workers
+        self.threshold = threshold
+        self.processes = processes
+
+        self._executor: Executor | None = None
+
+    def _get_executor(self) -> Executor:
+        if not self._executor:
+            pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    def parse(self, posts: List[Post]) -> List[PostIntent]:
+        # пул окупается только на большом отставании, обычная итерация - пара постов
+        if self.workers <= 1 or len(posts) < self.threshold:
+            return [parse_post_intent(post.num, post.comment) for post in posts]
+
+        nums = [post.num for post in posts]
+        comments = [post.comment for post in posts]
+        chunksize = max(1, len(posts) // (self.workers * 4))
+
+        # map отдаёт результаты в порядке постов
+        return list(self._get_executor().map(parse_post_intent, nums, comments, chunksize=chunksize))
+
+    def close(self) -> None:
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
@@ -16,7 +16,10 @@ class PremodHandler:
     _black_list_path: Path = _path / 'black_list.txt'
     _ban_reasons_path: Path = _path / 'ban_reasons.txt'
 
-    def __init__(self) -> None:
+    def __init__(self, auto_approve: bool = False) -> None:
+        # без интерактива: всех, кого нет в чёрном списке, пропускаем
+        self.auto_approve = auto_approve
+
         self.white_list = self.get_white_list()
         self.black_list = self.get_black_list()
 
@@ -127,6 +130,8 @@ class PremodHandler:
             return False, "in black list"
         if self.in_white_list(player_name):
             return True, None
+        if self.auto_approve:
+            return True, None
 
         print()
 
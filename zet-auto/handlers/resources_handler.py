@@ -1,11 +1,13 @@
 from json import load
 from pathlib import Path
-from typing import List, Dict
+from threading import Lock
+from typing import List, Dict, Tuple
 from uuid import uuid4
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 from webcolors import hex_to_rgb
 
+from handlers.tile_graph import TileGraph
 from model.models import Player
 
 
@@ -16,6 +18,21 @@ class ResourcesHandler:
     with (_path / 'tiles_data.json').open('r', encoding='utf-8') as f:
         _tiles_data: Dict = load(f)
 
+    _graph: TileGraph = TileGraph(_tiles_data)
+
+    # карта меток: в каждом пикселе номер клетки + 1, чью область залил бы floodfill
+    # из её точки на чистой карте, и 0 вне клеток. в 'L' помещается 254 клетки (255 - ещё не залито)
+    assert len(_tiles_data) <= 254, f"клеток {len(_tiles_data)}, в карту меток 'L' помещается 254"
+
+    # строится при первой отрисовке, а отрисовки разных игр идут из разных потоков
+    _labels_lock: Lock = Lock()
+    _labels: Image.Image | None = None
+    _tiles_mask: Image.Image | None = None
+    _tile_labels: Dict[str, int] = {}
+
+    # клетка -> (рамка, маска) её области
+    _masks: Dict[str, Tuple[Tuple[int, int, int, int], Image.Image]] = {}
+
     @classmethod
     def get_op_post(cls) -> str:
         return (cls._path / 'op_post.txt').open('r', encoding='utf-8').read()
@@ -24,38 +41,104 @@ class ResourcesHandler:
     def get_tile(cls, tile_id: str) -> Dict | None:
         return cls._tiles_data.get(tile_id)
 
+    @classmethod
+    def get_tile_ids(cls) -> List[str]:
+        return list(cls._tiles_data)
+
+    @classmethod
+    def get_graph(cls) -> TileGraph:
+        return cls._graph
+
     @classmethod
     def tile_exists(cls, tile_id: str) -> bool:
         return tile_id in cls._tiles_data
 
     @classmethod
     def calc_distance(cls, first_tile_id: str,  second_tile_id: str) -> float:
-        first_tile = cls.get_tile(first_tile_id)
-        second_tile = cls.get_tile(second_tile_id)
-
-        x1, y1 = first_tile.get('x'), first_tile.get('y')
-        x2, y2 = second_tile.get('x'), second_tile.get('y')
-
-        distance = ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
-        return distance
+        return cls._graph.distance(cls._graph.index[first_tile_id], cls._graph.index[second_tile_id])
 
     @classmethod
     def draw_map(cls, players: List[Player]) -> Image.Image:
-        map_image = cls._map.copy()
+        labels = cls.get_labels()
 
-        for player in players:
-            for tile in player.tiles:
+        # палитра метка -> цвет: у свободных клеток их собственный цвет на карте, у занятых - владельца
+        palette = [0, 0, 0] * 256
+        for tile_id, label in cls._tile_labels.items():
+            tile = cls._tiles_data[tile_id]
+            palette[label * 3:label * 3 + 3] = cls._map.getpixel((tile['x'], tile['y']))
 
-                tile = cls.get_tile(tile)
+        for player in players:
+            for tile_id in player.tiles:
+                if tile_id in cls._tile_labels:
+                    label = cls._tile_labels[tile_id]
+                    palette[label * 3:label * 3 + 3] = player.color_rgb
 
-                ImageDraw.floodfill(
-                    map_image,
-                    (tile.get('x'), tile.get('y')),
-                    player.color_rgb,
-                )
+        colored = labels.copy()
+        colored.putpalette(palette)
 
+        map_image = cls._map.copy()
+        map_image.paste(colored.convert('RGB'), mask=cls._tiles_mask)
         return map_image
 
+    @classmethod
+    def get_map(cls) -> Image.Image:
+        return cls._map
+
+    @classmethod
+    def _build_labels(cls) -> None:
+        labels = Image.new('L', cls._map.size, 0)
+        tile_labels: Dict[str, int] = {}
+
+        seeds: Dict[Tuple[int, int, int], List[str]] = {}
+        for tile_id, tile in cls._tiles_data.items():
+            seeds.setdefault(cls._map.getpixel((tile['x'], tile['y'])), []).append(tile_id)
+
+        for color, tile_ids in seeds.items():
+            # 255 там, где пиксель карты того же цвета, что и точки этих клеток
+            diff = ImageChops.difference(cls._map, Image.new('RGB', cls._map.size, color))
+            r, g, b = diff.split()
+            region = ImageChops.lighter(ImageChops.lighter(r, g), b).point(lambda v: 0 if v else 255)
+
+            for tile_id in tile_ids:
+                tile = cls._tiles_data[tile_id]
+                xy = (tile['x'], tile['y'])
+
+                # клетка в уже залитой области другой клетки получает ту же метку
+                if region.getpixel(xy) == 255:
+                    ImageDraw.floodfill(region, xy, len(tile_labels) + 1)
+                tile_labels[tile_id] = region.getpixel(xy)
+
+            labels.paste(region, mask=region.point(lambda v: 255 if 0 < v < 255 else 0))
+
+        # карта меток публикуется последней: кто её видит, видит и остальное
+        cls._tile_labels = tile_labels
+        cls._tiles_mask = labels.point(lambda v: 255 if v else 0)
+        cls._labels = labels
+
+    @classmethod
+    def get_labels(cls) -> Image.Image:
+        # строится один раз при первой отрисовке: это по floodfill на каждую клетку
+        if cls._labels is None:
+            with cls._labels_lock:
+                if cls._labels is None:
+                    cls._build_labels()
+        return cls._labels
+
+    @classmethod
+    def get_tile_mask(cls, tile_id: str) -> Tuple[Tuple[int, int, int, int], Image.Image]:
+        if tile_id in cls._masks:
+            return cls._masks[tile_id]
+
+        labels = cls.get_labels()
+        label = cls._tile_labels[tile_id]
+
+        region = labels.point(lambda v: 255 if v == label else 0)
+        box = region.getbbox()
+        mask = region.crop(box)
+
+        cls._masks[tile_id] = box, mask
+        return box, mask
+
     @classmethod
     def _draw_player_title(cls, name: str, color: str) -> Image.Image:
         w, h = 960, 50
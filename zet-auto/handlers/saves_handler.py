@@ -1,12 +1,13 @@
 from pathlib import Path
 from pickle import dump, load
-from typing import List
+from typing import List, Tuple
 
 from model.models import GameData
 
 
 class SavesHandler:
     _extension: str = '.zet'
+    _journal_extension: str = '.journal'
     _path: Path = Path(__file__).parent / 'saves'
 
     _path.mkdir(exist_ok=True)
@@ -23,20 +24,45 @@ class SavesHandler:
             if p.suffix == cls._extension
         ]
 
+    @classmethod
+    def get_journal_path(cls, name: str) -> Path:
+        return cls._path / f"{name}{cls._journal_extension}"
+
     @classmethod
     def exists(cls, name: str) -> bool:
         return cls._get_path(name).exists()
 
     @classmethod
     def load(cls, name: str) -> GameData:
+        return cls.load_snapshot(name)[0]
+
+    @classmethod
+    def load_snapshot(cls, name: str) -> Tuple[GameData, int]:
+        # за моделью лежит номер последнего действия журнала, вошедшего в снимок.
+        # у старых сохранений его нет
         with cls._get_path(name).open('rb') as f:
-            return load(f)
+            model = load(f)
+            try:
+                seq = load(f)
+            except EOFError:
+                seq = 0
+
+        return model, seq
 
     @classmethod
-    def dump(cls, name: str, model: GameData) -> None:
-        with cls._get_path(name).open('wb') as f:
+    def dump(cls, name: str, model: GameData, seq: int = 0) -> None:
+        path = cls._get_path(name)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+
+        with tmp.open('wb') as f:
             dump(model, f)
+            dump(seq, f)
+        tmp.replace(path)
+
+        # всё из журнала теперь есть в снимке
+        cls.get_journal_path(name).unlink(missing_ok=True)
 
     @classmethod
     def delete(cls, name: str) -> None:
         cls._get_path(name).unlink(missing_ok=True)
+        cls.get_journal_path(name).unlink(missing_ok=True)
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+from random import Random
+from typing import Dict, List
+
+from handlers.resources_handler import ResourcesHandler
+
+
+class ThreadGenerator:
+    _syllables = ['ка', 'ра', 'но', 'ви', 'ла', 'то', 'ми', 'ре', 'су', 'да', 'ло', 'ни', 'ба', 'ту', 'ге', 'зо']
+    _weekdays = ['Пнд', 'Втр', 'Срд', 'Чтв', 'Птн', 'Суб', 'Вск']
+
+    def __init__(self, seed: int = 0, thread_num: int = 100000, start: datetime | None = None,
+                 realtime: bool = False) -> None:
+        self.random = Random(seed)
+        self.thread_num = thread_num
+        self.realtime = realtime  # даты постов по часам, а не синтетические
+
+        self._num = thread_num
+        self._number = 0
+        self._time = start or datetime(2026, 1, 1, 12, 0, 0)
+
+        self._tiles = ResourcesHandler.get_tile_ids()
+        self._names: List[str] = []
+        self._colors: Dict[str, str] = {}
+        self.roll_bases: Dict[int, str] = {}  # num роллбазы -> имя страны
+
+    def _new_name(self) -> str:
+        while True:
+            name = ''.join(self.random.choice(self._syllables) for _ in range(self.random.randint(2, 4)))
+            name = name.capitalize()
+            if name not in self._names:
+                self._names.append(name)
+                return name
+
+    def _color(self) -> str:
+        return '#' + ''.join(self.random.choice('0123456789abcdef') for _ in range(6))
+
+    @staticmethod
+    def _reply(num: int) -> str:
+        return f'<a href="#{num}" class="post-reply-link" data-num="{num}">&gt;&gt;{num}</a><br>'
+
+    def post(self, comment: str, sage: bool = False, gap: float = 5.0) -> Dict:
+        self._num += self.random.randint(1, 40)
+        self._number += 1
+        if self.realtime:
+            self._time = datetime.now()
+        else:
+            self._time += timedelta(seconds=self.random.expovariate(1 / gap) if gap else 0)
+
+        return {
+            'num': self._num,
+            'number': self._number,
+            'comment': comment,
+            'date': f"{self._time:%d/%m/%y} {self._weekdays[self._time.weekday()]} {self._time:%H:%M:%S}",
+            'email': 'mailto:sage' if sage else '',
+        }
+
+    @property
+    def last_num(self) -> int:
+        return self._num
+
+    def op_post(self) -> Dict:
+        self._num = self.thread_num - 1
+        return self.post('Тред игры', gap=0)
+
+    def roll_base(self, new: bool | None = None, same_color: bool = False) -> Dict:
+        if new is None:
+            new = not self._names or self.random.random() < 0.7
+
+        name = self._new_name() if new else self.random.choice(self._names)
+
+        # без same_color у старой страны цвет случайный, и такую роллбазу отклонят
+        color = self._colors[name] if same_color and name in self._colors else self._color()
+        self._colors.setdefault(name, color)
+
+        post = self.post(f'роллбаза<br>{name}<br>{color}')
+        self.roll_bases[post['num']] = name
+        return post
+
+    def country_roll_base(self, name: str) -> Dict:
+        # новая роллбаза уже известной страны, например в следующем треде
+        post = self.post(f'роллбаза<br>{name}<br>{self._colors[name]}')
+        self.roll_bases[post['num']] = name
+        return post
+
+    def rollover(self, thread_num: int) -> None:
+        # перекат: нумерация и роллбазы начинаются заново, страны остаются
+        self.thread_num = thread_num
+        self._num = thread_num
+        self._number = 0
+        self.roll_bases.clear()
+
+    def explicit_roll(self) -> Dict:
+        rb = self.random.choice(list(self.roll_bases))
+        tiles = ' '.join(self.random.sample(self._tiles, self.random.randint(1, 4)))
+        return self.post(f'{self._reply(rb)}ролл {tiles}')
+
+    def expansion_roll(self) -> Dict:
+        rb = self.random.choice(list(self.roll_bases))
+        return self.post(f'{self._reply(rb)}ролл расширение')
+
+    def attack_roll(self) -> Dict:
+        rb = self.random.choice(list(self.roll_bases))
+        return self.post(f'{self._reply(rb)}ролл против {self.random.choice(self._names).lower()}')
+
+    def invalid_post(self) -> Dict:
+        kind = self.random.randrange(4 if self.roll_bases else 3)
+
+        if kind == 0:  # имя латиницей
+            return self.post(f'роллбаза<br>Country<br>{self._color()}')
+        if kind == 1:  # слишком длинное имя
+            return self.post(f'роллбаза<br>{"Ка" * 30}<br>{self._color()}')
+        if kind == 2:  # ответ не на роллбазу
+            return self.post(f'{self._reply(self._num)}ролл {self.random.choice(self._tiles)}')
+
+        # несуществующие клетки
+        rb = self.random.choice(list(self.roll_bases))
+        return self.post(f'{self._reply(rb)}ролл 99z 0a')
+
+    def chatter(self) -> Dict:
+        return self.post(self.random.choice(['бамп', 'ролл', 'годнота', 'рейт']), sage=self.random.random() < 0.3)
+
+    def random_post(self) -> Dict:
+        if not self.roll_bases:
+            return self.roll_base()
+
+        return self.random.choices(
+            [self.roll_base, self.explicit_roll, self.expansion_roll, self.attack_roll, self.chatter],
+            weights=[1, 4, 3, 2, 4],
+        )[0]()
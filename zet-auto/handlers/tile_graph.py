@@ -0,0 +1,65 @@
+from array import array
+from sys import intern
+from typing import Dict, Iterable, List
+
+
+# граф клеток, собранный один раз при загрузке: клетки пронумерованы по порядку
+# в tiles_data.json, соседи лежат подряд в одном массиве (CSR), а у каждой клетки
+# есть маска соседей, так что проверка "граничит ли клетка с владениями" - одно "&"
+class TileGraph:
+    def __init__(self, tiles_data: Dict[str, Dict]) -> None:
+        self.ids: List[str] = [intern(tile_id) for tile_id in tiles_data]
+        self.index: Dict[str, int] = {tile_id: i for i, tile_id in enumerate(self.ids)}
+
+        self.xs = array('i', (tile['x'] for tile in tiles_data.values()))
+        self.ys = array('i', (tile['y'] for tile in tiles_data.values()))
+
+        # соседи клетки i - targets[offsets[i]:offsets[i + 1]], в порядке из json
+        self.offsets = array('i', [0])
+        self.targets = array('i')
+        self.route_masks: List[int] = []
+
+        for tile in tiles_data.values():
+            routes = [self.index[route] for route in tile['routes']]
+
+            self.targets.extend(routes)
+            self.offsets.append(len(self.targets))
+            self.route_masks.append(self.mask_of(routes))
+
+        # расстояния между центрами всех пар клеток, строка i - distances[i * n:(i + 1) * n]
+        n = len(self.ids)
+        self.distances = array('d', bytes(8 * n * n))
+        for i in range(n):
+            xi, yi = self.xs[i], self.ys[i]
+            self.distances[i * n:(i + 1) * n] = array('d', (
+                ((xi - xj) ** 2 + (yi - yj) ** 2) ** 0.5
+                for xj, yj in zip(self.xs, self.ys)
+            ))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def neighbors(self, i: int) -> array:
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def distance(self, i: int, j: int) -> float:
+        return self.distances[i * len(self.ids) + j]
+
+    def row(self, i: int) -> memoryview:
+        n = len(self.ids)
+        return memoryview(self.distances)[i * n:(i + 1) * n]
+
+    def is_routed(self, i: int, mask: int) -> bool:
+        return bool(self.route_masks[i] & mask)
+
+    @staticmethod
+    def mask_of(indices: Iterable[int]) -> int:
+        mask = 0
+        for i in indices:
+            mask |= 1 << i
+        return mask
+
+    def mask(self, tile_ids: Iterable[str]) -> int:
+        # клеток не с карты (из старых сохранений) в графе нет, они просто пропускаются
+        index = self.index
+        return self.mask_of(index[tile_id] for tile_id in tile_ids if tile_id in index)
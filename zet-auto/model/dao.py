@@ -2,18 +2,121 @@ from typing import Dict, List, Optional
 
 from webcolors import hex_to_rgb
 
-from config import DvachConfig
+from config import AppConfig, DvachConfig
+from exceptions import TileOwnersMismatchException
+from handlers.resources_handler import ResourcesHandler
 from handlers.saves_handler import SavesHandler
+from model.frontier import CaptureFrontier
+from model.journal import GameJournal
 from model.models import GameData, Player, RollBase
+from model.name_index import NameIndex
 
 
 class GameDataDAO:
     def __init__(self, game_data_model: GameData):
         self._model = game_data_model
+        self._names = NameIndex(player.name for player in self._model.players)
+
+        # индексы по игрокам и роллбазам. меняются только через методы ниже,
+        # при загрузке строятся заново
+        self._players_by_name: Dict[str, Player] = {}
+        self._players_by_color: Dict[str, Player] = {}
+        self._roll_bases_by_num: Dict[int, RollBase] = {}
+        self._rebuild_indexes()
+
+        # клетка -> владелец и граница владений каждого игрока
+        self._owners: Dict[str, Player] = {}
+        self._graph = ResourcesHandler.get_graph()
+        self._frontier = CaptureFrontier(self._graph)
+        self._rebuild_owners()
+
+        # журнал изменений поверх снимка; без него сохраняется вся модель целиком
+        self.journal: GameJournal | None = None
 
     @staticmethod
-    def load(model_name: str) -> "GameDataDAO":
-        return GameDataDAO(SavesHandler.load(model_name))
+    def load(model_name: str, writable: bool = False) -> "GameDataDAO":
+        # последний снимок и хвост журнала после него.
+        # журнал дописывается только при writable, иначе файлы не трогаются
+        model, seq = SavesHandler.load_snapshot(model_name)
+        dao = GameDataDAO(model)
+
+        path = SavesHandler.get_journal_path(model_name)
+        if writable and GameJournal.repair(path):
+            print("Журнал обрывался на недописанном действии, хвост отрезан")
+
+        replayed = 0
+        for event in GameJournal.read(path, after=seq):
+            dao.apply(event)
+            seq = event[0]
+            replayed += 1
+
+        if writable:
+            dao.journal = GameJournal(path, seq)
+            dao.journal.pending = replayed
+        return dao
+
+    def save(self, model_name: str) -> None:
+        if self.journal:
+            self.journal.flush()
+            if self.journal.pending < AppConfig.SNAPSHOT_EVERY:
+                return
+
+        self.snapshot(model_name)
+
+    def snapshot(self, model_name: str) -> None:
+        if not self.journal:
+            SavesHandler.dump(model_name, self._model)
+            return
+
+        self.journal.flush()
+        SavesHandler.dump(model_name, self._model, self.journal.seq)
+        self.journal.snapshotted()
+
+    def _log(self, op: str, *args) -> None:
+        if self.journal:
+            self.journal.append(op, *args)
+
+    def _set_field(self, field: str, value) -> None:
+        if getattr(self._model, field) == value:
+            return
+
+        setattr(self._model, field, value)
+        self._log('s', field, value)
+
+    def _resolve_player(self, name: str) -> Player | None:
+        # игрок роллбазы мог быть уже удалён из players, но всё ещё захватывать клетки
+        return self._players_by_name.get(name) or next((
+            rb.player
+            for rb in self._model.roll_bases
+            if rb.player.name == name
+        ), None)
+
+    def apply(self, event: List) -> None:
+        _, op, *args = event
+
+        # при повторе журнала действия не пишутся в него заново
+        journal, self.journal = self.journal, None
+        try:
+            if op == 'p':
+                self.add_player(*args)
+            elif op == 'r':
+                post_num, name = args
+                self.add_roll_base(self._resolve_player(name), post_num)
+            elif op == 't':
+                tile_id, name = args
+                self.add_tile(self._resolve_player(name), tile_id)
+            elif op == 'd':
+                self.del_tile(*args)
+            elif op == 'e':
+                self.del_empty_players()
+            elif op == 'c':
+                del self.roll_bases
+            elif op == 's':
+                self._set_field(*args)
+            elif op == 'k':
+                self.update_cookies(*args)
+        finally:
+            self.journal = journal
 
     def __str__(self):
         s = ""
@@ -54,9 +157,9 @@ class GameDataDAO:
 
     @link.setter
     def link(self, new_val: str) -> None:
-        self._model.thread = new_val.split("/")[-1].split(".")[0]
-        self._model.board = new_val.split("/")[-3]
-        self._model.last_number = 1
+        self._set_field('thread', new_val.split("/")[-1].split(".")[0])
+        self._set_field('board', new_val.split("/")[-3])
+        self._set_field('last_number', 1)
 
     @property
     def board(self) -> str:
@@ -64,7 +167,7 @@ class GameDataDAO:
 
     @board.setter
     def board(self, new_val: str) -> None:
-        self._model.board = new_val
+        self._set_field('board', new_val)
 
     @property
     def thread(self) -> str:
@@ -72,7 +175,7 @@ class GameDataDAO:
 
     @thread.setter
     def thread(self, new_val: str) -> None:
-        self._model.thread = new_val
+        self._set_field('thread', new_val)
 
     @property
     def paste(self) -> str:
@@ -80,7 +183,7 @@ class GameDataDAO:
 
     @paste.setter
     def paste(self, new_paste: str) -> None:
-        self._model.paste = new_paste
+        self._set_field('paste', new_paste)
 
     @property
     def last_number(self) -> int:
@@ -88,16 +191,41 @@ class GameDataDAO:
 
     @last_number.setter
     def last_number(self, new_val: int) -> None:
-        self._model.last_number = new_val
+        self._set_field('last_number', new_val)
 
     @property
     def cookies(self) -> Dict[str, str]:
         return self._model.cookies
 
+    def update_cookies(self, cookies: Dict[str, str]) -> None:
+        self._model.cookies.update(cookies)
+        self._log('k', cookies)
+
     @property
     def players(self) -> List[Player]:
         return self._model.players
 
+    def _rebuild_indexes(self) -> None:
+        self._players_by_name.clear()
+        self._players_by_color.clear()
+        self._roll_bases_by_num.clear()
+
+        # при повторах (старые сохранения) в индексе остаётся первый, как при поиске по списку
+        for player in self._model.players:
+            self._players_by_name.setdefault(player.name, player)
+            self._players_by_color.setdefault(player.color_hex, player)
+
+        for rb in self._model.roll_bases:
+            self._roll_bases_by_num.setdefault(rb.post_num, rb)
+
+    @staticmethod
+    def _player_matches(player: Player | None, name: Optional[str], color: Optional[str]) -> bool:
+        return (
+            player is not None
+            and (not name or player.name == name)
+            and (not color or player.color_hex == color)
+        )
+
     def get_player(
             self, *,
             name: Optional[str] = None,
@@ -108,24 +236,21 @@ class GameDataDAO:
         if not name and not color and rb_num is None:
             return None
 
+        # игрок роллбазы может быть уже удалён из players, но всё равно находится
         if rb_num:
-            player = next((
-                rb.player
-                for rb in self._model.roll_bases
-                if (rb.post_num == rb_num)
-                and (not name or rb.player.name == name)
-                and (not color or rb.player.color_hex == color)
-            ), None)
-
-            if player:
-                return player
-
-        return next((
-            player
-            for player in self._model.players
-            if (not name or player.name == name)
-            and (not color or player.color_hex == color)
-        ), None)
+            rb = self._roll_bases_by_num.get(rb_num)
+            if rb and self._player_matches(rb.player, name, color):
+                return rb.player
+
+        if name:
+            player = self._players_by_name.get(name)
+        elif color:
+            player = self._players_by_color.get(color)
+        else:
+            # ни имени, ни цвета: раньше здесь отдавался первый игрок
+            player = next(iter(self._model.players), None)
+
+        return player if self._player_matches(player, name, color) else None
 
     def check_player(
             self, *,
@@ -134,25 +259,13 @@ class GameDataDAO:
             rb_num: Optional[int] = None,
     ) -> bool:
 
-        if name and next((
-                True
-                for player in self._model.players
-                if player.name == name
-        ), False):
+        if name and name in self._players_by_name:
             return True
 
-        if color and next((
-                True
-                for player in self._model.players
-                if player.color_hex == color
-        ), False):
+        if color and color in self._players_by_color:
             return True
 
-        if rb_num and next((
-                True
-                for rb in self._model.roll_bases
-                if rb.post_num == rb_num
-        ), False):
+        if rb_num and rb_num in self._roll_bases_by_num:
             return True
 
         return False
@@ -167,14 +280,38 @@ class GameDataDAO:
             color_rgb=hex_to_rgb(color),
         )
         self._model.players.append(player)
+        self._players_by_name[name] = player
+        self._players_by_color[color] = player
+        self._names.add(name)
+        self._log('p', name, color)
         return player
 
+    def get_closest_player(self, name: str, cutoff: float = 0.6) -> Player | None:
+        closest = self._names.closest(name, cutoff)
+        if not closest:
+            return None
+        return self.get_player(name=closest)
+
     def del_empty_players(self) -> None:
+        for player in self._model.players:
+            if not player.tiles:
+                self._names.remove(player.name)
+                self._frontier.forget(player.name)
+
+                if self._players_by_name.get(player.name) is player:
+                    del self._players_by_name[player.name]
+                if self._players_by_color.get(player.color_hex) is player:
+                    del self._players_by_color[player.color_hex]
+
         self._model.players = [
             player
             for player in self._model.players
             if player.tiles
         ]
+        self._log('e')
+
+        # у удалённых игроков клеток нет, так что владельцы не меняются
+        self._verify_in_debug()
 
     empty_players = property(fdel=del_empty_players)
 
@@ -185,13 +322,11 @@ class GameDataDAO:
     @roll_bases.deleter
     def roll_bases(self) -> None:
         self._model.roll_bases = []
+        self._roll_bases_by_num.clear()
+        self._log('c')
 
     def get_roll_base(self, post_num: int) -> RollBase | None:
-        return next((
-            rb
-            for rb in self._model.roll_bases
-            if rb.post_num == post_num
-        ), None)
+        return self._roll_bases_by_num.get(post_num)
 
     def add_roll_base(self, player: Player, post_num: int) -> RollBase | None:
         if self.get_roll_base(post_num):
@@ -199,23 +334,88 @@ class GameDataDAO:
 
         roll_base = RollBase(player=player, post_num=post_num,)
         self._model.roll_bases.append(roll_base)
+        self._roll_bases_by_num[post_num] = roll_base
+        self._log('r', post_num, player.name)
         return roll_base
 
+    def _rebuild_owners(self) -> None:
+        self._owners.clear()
+        self._frontier.clear()
+
+        # если клетка по ошибке записана двоим, владелец - первый, как и раньше в del_tile
+        for player in self._model.players:
+            for tile_id in player.tiles:
+                if tile_id in self._owners:
+                    continue
+
+                self._owners[tile_id] = player
+                if tile_id in self._graph.index:
+                    self._frontier.gain(player.name, self._graph.index[tile_id])
+
+    def verify_owners(self) -> None:
+        expected = {}
+        for player in self._model.players:
+            for tile_id in player.tiles:
+                expected.setdefault(tile_id, player)
+
+        if expected.keys() != self._owners.keys():
+            raise TileOwnersMismatchException(f"{sorted(expected.keys() ^ self._owners.keys())}")
+
+        for tile_id, player in expected.items():
+            if self._owners[tile_id] is not player:
+                raise TileOwnersMismatchException(f"{tile_id}: {self._owners[tile_id].name} != {player.name}")
+
+            i = self._graph.index.get(tile_id)
+            if i is not None and self._frontier.get_owner(i) != player.name:
+                raise TileOwnersMismatchException(f"{tile_id}: граница {self._frontier.get_owner(i)} != {player.name}")
+
+    def _verify_in_debug(self) -> None:
+        if AppConfig.DEBUG:
+            self.verify_owners()
+
+    def get_tile_owner(self, tile_id: str) -> Player | None:
+        return self._owners.get(tile_id)
+
+    def get_owned_tiles(self) -> List[str]:
+        return list(self._owners)
+
+    def add_tile(self, player: Player, tile_id: str) -> str | None:
+        # клетку забирают у прежнего владельца, если он есть; в журнал идёт только захват
+        attacked = self._del_tile(tile_id)
+
+        player.tiles.append(tile_id)
+        self._owners[tile_id] = player
+        if tile_id in self._graph.index:
+            self._frontier.gain(player.name, self._graph.index[tile_id])
+        self._log('t', tile_id, player.name)
+
+        self._verify_in_debug()
+        return attacked
+
     def del_tile(self, tile_id: str) -> str | None:
-        player = next((
-            player
-            for player in self._model.players
-            if tile_id in player.tiles
-        ), None)
+        attacked = self._del_tile(tile_id)
+        if attacked:
+            self._log('d', tile_id)
+        return attacked
+
+    def _del_tile(self, tile_id: str) -> str | None:
+        player = self._owners.pop(tile_id, None)
 
         if not player:
             return None
 
         player.tiles.remove(tile_id)
+        if tile_id in self._graph.index:
+            self._frontier.lose(self._graph.index[tile_id])
+
+        self._verify_in_debug()
         return player.name
 
-    def is_tile_free(self, tile_id: str) -> bool:
-        for player in self._model.players:
-            if tile_id in player.tiles:
-                return False
-        return True
+    def get_nearest_free_tile(self, player: Player) -> str | None:
+        i = self._frontier.nearest(player.name, None)
+        return self._graph.ids[i] if i is not None else None
+
+    def get_nearest_enemy_tile(self, player: Player, enemy: Player) -> str | None:
+        # своих клеток на границе нет, так что атака на себя ничего не находит
+        i = self._frontier.nearest(player.name, enemy.name)
+        return self._graph.ids[i] if i is not None else None
@@ -0,0 +1,120 @@
+from heapq import heappop, heappush
+from typing import Dict, List, Tuple
+
+from handlers.tile_graph import TileGraph
+
+# (расстояние, кандидат, клетка игрока рядом с ним, номер захвата этой клетки)
+Entry = Tuple[float, int, int, int]
+
+
+# граница владений каждого игрока: пары "своя клетка - соседняя чужая или свободная",
+# разложенные по кучам по владельцу соседней клетки (None - свободные).
+# кучи не чистятся при захватах: устаревшие пары отбрасываются, когда всплывают наверх.
+# граф считается симметричным: если b в routes у a, то и a в routes у b
+class CaptureFrontier:
+    def __init__(self, graph: TileGraph) -> None:
+        self.graph = graph
+
+        # клетка -> её номер в routes каждого соседа (первое вхождение)
+        self._route_pos: List[Dict[int, int]] = [{} for _ in range(len(graph))]
+        for t in range(len(graph)):
+            for pos, c in enumerate(graph.neighbors(t)):
+                self._route_pos[t].setdefault(c, pos)
+
+        self._owners: Dict[int, str] = {}
+        # номер захвата клетки: порядок клеток в player.tiles совпадает с порядком захвата
+        self._seq: Dict[int, int] = {}
+        self._counter = 0
+
+        # игрок -> владелец соседних клеток -> куча пар
+        self._heaps: Dict[str, Dict[str | None, List[Entry]]] = {}
+
+    def clear(self) -> None:
+        self._owners.clear()
+        self._seq.clear()
+        self._heaps.clear()
+
+    def get_owner(self, i: int) -> str | None:
+        return self._owners.get(i)
+
+    def _push(self, player: str, target: str | None, c: int, t: int, distance: float) -> None:
+        heap = self._heaps.setdefault(player, {}).setdefault(target, [])
+        heappush(heap, (distance, c, t, self._seq[t]))
+
+    def gain(self, player: str, i: int) -> None:
+        self._owners[i] = player
+        self._seq[i] = self._counter
+        self._counter += 1
+
+        # матрица расстояний симметрична, так что хватает строки новой клетки
+        distances = self.graph.row(i)
+
+        for n in self.graph.neighbors(i):
+            owner = self._owners.get(n)
+
+            # соседняя клетка стала кандидатом для нового владельца
+            if owner != player:
+                self._push(player, owner, n, i, distances[n])
+
+            # а новая клетка - кандидатом для владельца соседней
+            if owner and owner != player:
+                self._push(owner, player, i, n, distances[n])
+
+    def lose(self, i: int) -> None:
+        if self._owners.pop(i, None) is None:
+            return
+        self._seq.pop(i)
+
+        # клетка освободилась - она кандидат на расширение у всех соседей
+        distances = self.graph.row(i)
+
+        for n in self.graph.neighbors(i):
+            if owner := self._owners.get(n):
+                self._push(owner, None, i, n, distances[n])
+
+    def forget(self, player: str) -> None:
+        # у удаляемого игрока клеток уже нет
+        self._heaps.pop(player, None)
+        for heaps in self._heaps.values():
+            heaps.pop(player, None)
+
+    def _is_valid(self, player: str, target: str | None, entry: Entry) -> bool:
+        _, c, t, seq = entry
+        return self._owners.get(t) == player and self._seq[t] == seq and self._owners.get(c) == target
+
+    def _position(self, player: str, c: int) -> Tuple[int, int]:
+        # при равных расстояниях раньше побеждал кандидат, первым найденный при
+        # обходе клеток игрока по порядку и их routes по порядку
+        return min(
+            (self._seq[t], self._route_pos[t][c])
+            for t in self.graph.neighbors(c)
+            if self._owners.get(t) == player
+        )
+
+    def nearest(self, player: str, target: str | None) -> int | None:
+        heap = self._heaps.get(player, {}).get(target)
+        if not heap:
+            return None
+
+        while heap and not self._is_valid(player, target, heap[0]):
+            heappop(heap)
+
+        if not heap:
+            return None
+
+        # все действующие пары с тем же расстоянием, что и у лучшей
+        distance = heap[0][0]
+        tied = []
+        while heap and heap[0][0] == distance:
+            entry = heappop(heap)
+            if self._is_valid(player, target, entry):
+                tied.append(entry)
+
+        for entry in tied:
+            heappush(heap, entry)
+
+        candidates = {entry[1] for entry in tied}
+        if len(candidates) == 1:
+            return tied[0][1]
+
+        return min(candidates, key=lambda c: self._position(player, c))
@@ -0,0 +1,96 @@
+from json import dumps, loads
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+
+# журнал действий игры поверх последнего снимка: одна строка json на действие,
+# [номер, код, аргументы...]. коды:
+#   p - новый игрок (имя, цвет)          r - роллбаза (номер поста, имя игрока)
+#   t - клетка захвачена (клетка, имя)   d - клетка освобождена (клетка)
+#   e - удалены игроки без клеток        c - роллбазы сброшены (перекат)
+#   s - поле сохранения (имя поля, значение)
+#   k - куки (словарь)
+class GameJournal:
+    def __init__(self, path: Path, seq: int = 0) -> None:
+        self.path = path
+        self.seq = seq
+
+        self._events: List[List] = []
+        # поля сохранения важны только последним значением, так что на каждый flush пишется одно
+        self._fields: Dict[str, object] = {}
+
+        self.pending = 0  # действий записано с последнего снимка
+
+    def append(self, op: str, *args) -> None:
+        if op == 's':
+            field, value = args
+            self._fields[field] = value
+            return
+
+        self._events.append([op, *args])
+
+    def flush(self) -> int:
+        events = self._events + [['s', field, value] for field, value in self._fields.items()]
+        self._events, self._fields = [], {}
+
+        if not events:
+            return 0
+
+        lines = []
+        for event in events:
+            self.seq += 1
+            lines.append(dumps([self.seq, *event], ensure_ascii=False, separators=(',', ':')))
+
+        data = '\n'.join(lines) + '\n'
+        with self.path.open('a', encoding='utf-8') as f:
+            f.write(data)
+
+        self.pending += len(events)
+        return len(data)
+
+    def snapshotted(self) -> None:
+        # снимок включает всё до self.seq, старый журнал удаляется вместе с записью снимка
+        self.pending = 0
+
+    @staticmethod
+    def repair(path: Path) -> bool:
+        # после падения посреди записи в конце может остаться недописанная строка.
+        # её нужно отрезать до дозаписи, иначе новые действия приклеятся к ней и потеряются
+        if not path.exists():
+            return False
+
+        end = 0
+        with path.open('rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    loads(line)
+                except ValueError:
+                    break
+                end += len(line)
+
+        if end == path.stat().st_size:
+            return False
+
+        with path.open('r+b') as f:
+            f.truncate(end)
+        return True
+
+    @staticmethod
+    def read(path: Path, after: int = 0) -> Iterator[List]:
+        if not path.exists():
+            return
+
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                # недописанная строка после падения - дальше ничего нет
+                if not line.endswith('\n'):
+                    return
+                try:
+                    event = loads(line)
+                except ValueError:
+                    return
+
+                if event[0] > after:
+                    yield event
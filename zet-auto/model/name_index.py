@@ -0,0 +1,140 @@
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Tuple
+
+# k-е вхождение символа в строку: общих токенов у двух строк ровно столько же,
+# сколько общих символов в quick_ratio
+Token = Tuple[str, int]
+
+# общий для всех строк порядок токенов, редкие первыми: повторные вхождения,
+# потом символы не из алфавита, потом буквы от редких к частым
+_FREQUENT = ' оеаинтсрвлкмдпуяызьбгчйхжюшцщэфъё'
+_RARITY = {ch: i for i, ch in enumerate(reversed(_FREQUENT))}
+
+
+def _tokens(counts: Counter) -> List[Token]:
+    return sorted(
+        ((ch, k) for ch, count in counts.items() for k in range(count)),
+        key=lambda token: (-token[1], _RARITY.get(token[0].lower(), -1), token[0]),
+    )
+
+
+def _min_common(length: int, cutoff: float) -> int | None:
+    # сколько общих символов нужно строке длины length, чтобы хоть с какой-то строкой пройти
+    # real_quick_ratio и quick_ratio (хуже всего - с самой короткой подходящей).
+    # считается теми же выражениями, что и проверки в closest, чтобы не расходиться в округлении
+    other = next((n for n in range(1, length + 1) if 2.0 * n / (n + length) >= cutoff), None)
+    if other is None:
+        return None
+    return next((t for t in range(length + 1) if 2.0 * t / (other + length) >= cutoff), None)
+
+
+def _prefix(length: int, cutoff: float) -> int:
+    # если у двух строк хотя бы t общих токенов, то их первые len - t + 1 токенов
+    # в общем порядке пересекаются (prefix filtering)
+    common = _min_common(length, cutoff)
+    if common is None:
+        return 0
+    return length - common + 1 if common > 0 else length
+
+
+# нечёткий поиск имени с той же отсечкой, что у difflib.get_close_matches.
+# в индексе у каждого имени только префикс его токенов, так что кандидатами становятся
+# лишь имена, делящие со словом редкий символ, а честный ratio считается по убыванию
+# верхней оценки quick_ratio, пока она не опустится ниже лучшего
+class NameIndex:
+    def __init__(self, names: Iterable[str] = (), cutoff: float = 0.6) -> None:
+        self.cutoff = cutoff
+
+        # токен -> {имя: номер токена в упорядоченных токенах имени}
+        self._postings: Dict[Token, Dict[str, int]] = defaultdict(dict)
+        self._counts: Dict[str, Counter] = {}
+        self.rebuild(names)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._counts
+
+    def rebuild(self, names: Iterable[str]) -> None:
+        self._postings.clear()
+        self._counts.clear()
+
+        for name in names:
+            self.add(name)
+
+    def _indexed(self, name: str) -> List[Token]:
+        return _tokens(self._counts[name])[:_prefix(len(name), self.cutoff)]
+
+    def add(self, name: str) -> None:
+        if name in self._counts:
+            return
+
+        self._counts[name] = Counter(name)
+        for j, token in enumerate(self._indexed(name)):
+            self._postings[token][name] = j
+
+    def remove(self, name: str) -> None:
+        if name not in self._counts:
+            return
+
+        for token in self._indexed(name):
+            del self._postings[token][name]
+            if not self._postings[token]:
+                del self._postings[token]
+        del self._counts[name]
+
+    def _candidates(self, word: str, counts: Counter, cutoff: float) -> Iterable[str]:
+        # префиксы в индексе посчитаны для self.cutoff: при отсечке ниже они могут пропустить имя
+        if cutoff <= 0 or cutoff < self.cutoff:
+            return self._counts
+
+        tokens = _tokens(counts)
+        # общих токенов, найденных в префиксах; None - имя уже отброшено
+        found: Dict[str, int | None] = {}
+
+        for i, token in enumerate(tokens[:_prefix(len(word), cutoff)]):
+            for name, j in self._postings.get(token, {}).items():
+                common = found.get(name, 0)
+                if common is None:
+                    continue
+
+                # позиционный фильтр: после i-го и j-го токена общих не больше, чем осталось в короче
+                upper = common + 1 + min(len(tokens) - i - 1, len(name) - j - 1)
+                length = len(name) + len(word)
+                found[name] = common + 1 if 2.0 * upper / length >= cutoff else None
+
+        return [name for name, common in found.items() if common is not None]
+
+    def closest(self, word: str, cutoff: float = 0.6) -> str | None:
+        counts = Counter(word)
+
+        # те же проверки, что в get_close_matches: real_quick_ratio и quick_ratio - верхние оценки ratio
+        bounds = []
+        for name in self._candidates(word, counts, cutoff):
+            length = len(name) + len(word)
+
+            if 2.0 * min(len(name), len(word)) / length < cutoff:
+                continue
+
+            bound = 2.0 * sum((counts & self._counts[name]).values()) / length
+            if bound >= cutoff:
+                bounds.append((bound, name))
+
+        s = SequenceMatcher()
+        s.set_seq2(word)
+        best = None
+
+        for bound, name in sorted(bounds, reverse=True):
+            if best and bound < best[0]:
+                break
+
+            s.set_seq1(name)
+            score = s.ratio()
+
+            # при равенстве get_close_matches берёт большее имя
+            if score >= cutoff and (not best or (score, name) > best):
+                best = (score, name)
+
+        return best[1] if best else None
@@ -0,0 +1,100 @@
+from json import loads
+from time import perf_counter
+from typing import Iterable, List
+
+from api.handler import DvachAPIHandler
+from api.recorder import TrafficRecord
+from controller import Controller
+
+
+class Replayer:
+    def __init__(self, controller: Controller, render: bool = True) -> None:
+        self.controller = controller
+        self.render = render
+
+        self.records = 0
+        self.posts = 0
+        self.renders = 0
+        self.decode_time = 0.0
+        self.parse_time = 0.0
+        self.render_time = 0.0
+
+    @staticmethod
+    def _raw_posts(record: TrafficRecord) -> List | None:
+        try:
+            data = loads(record.body)
+            if record.kind == 'full':
+                return data['threads'][0]['posts']
+            return data['posts']
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    def _replay_thread(self, record: TrafficRecord) -> None:
+        dao = self.controller.dao
+
+        start = perf_counter()
+        raw_posts = self._raw_posts(record)
+        if raw_posts is None:
+            return
+        thread = DvachAPIHandler.build_thread(raw_posts, dao.last_number - 1)
+        self.decode_time += perf_counter() - start
+
+        last_number = dao.last_number
+        start = perf_counter()
+        self.controller.parse_thread(thread)
+        self.parse_time += perf_counter() - start
+        self.posts += dao.last_number - last_number
+
+        if not self.controller.paste_handler.paste:
+            return
+
+        if self.render:
+            start = perf_counter()
+            self.controller.get_map_image()
+            if dao.players:
+                self.controller.get_players_image()
+            self.render_time += perf_counter() - start
+            self.renders += 1
+
+        # в проде паста ушла бы в тред
+        del self.controller.paste_handler.paste
+
+    def _replay_posting(self, record: TrafficRecord) -> None:
+        try:
+            data = loads(record.body)
+        except ValueError:
+            return
+
+        if not data.get('result') or not data.get('thread') or data.get('num'):
+            return
+
+        # перекат: новый тред начинается с чистыми роллбазами
+        dao = self.controller.dao
+        del dao.empty_players
+        del dao.roll_bases
+        self.controller.start_thread(data.get('thread'))
+
+    def replay(self, records: Iterable[TrafficRecord]) -> None:
+        start = perf_counter()
+
+        for record in records:
+            self.records += 1
+
+            if record.status != 200:
+                continue
+
+            if record.kind == 'post':
+                self._replay_posting(record)
+            else:
+                self._replay_thread(record)
+
+        total = perf_counter() - start
+
+        print(f"{'  реплей  ':=^60}")
+        print(f"Записей: {self.records}")
+        print(f"Постов обработано: {self.posts}")
+        print(f"Отрисовок: {self.renders}")
+        print(f"Декодирование: {self.decode_time:.3f} с")
+        print(f"Парсинг: {self.parse_time:.3f} с")
+        print(f"Отрисовка: {self.render_time:.3f} с")
+        print(f"Всего: {total:.3f} с ({self.posts / total if total else 0:.1f} постов/с)")
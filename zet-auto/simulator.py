@@ -0,0 +1,184 @@
+from random import Random
+from sys import platform
+from time import perf_counter
+from tracemalloc import start as start_tracing, stop as stop_tracing, get_traced_memory
+from typing import Dict, Iterator, List
+
+from api.handler import DvachAPIHandler
+from controller import Controller
+from handlers.thread_generator import ThreadGenerator
+from model.models import GameData
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:  # windows
+    getrusage = None
+
+
+class Simulator:
+    _bump_limit = 500
+
+    def __init__(
+        self, seed: int = 0, players: int = 20, roll_bases: int = 0, explicit: int = 300, expansion: int = 200,
+        attack: int = 100, invalid: int = 50, chatter: int = 200, batch: int = 50, render: bool = True,
+        memory: bool = False,
+    ) -> None:
+        self.seed = seed
+        self.players = players
+        self.counts = {
+            'roll_base': roll_bases,
+            'explicit': explicit,
+            'expansion': expansion,
+            'attack': attack,
+            'invalid': invalid,
+            'chatter': chatter,
+        }
+        self.batch = batch
+        self.render = render
+        self.memory = memory
+
+        self.generator = ThreadGenerator(seed=seed)
+        self.controller: Controller | None = None
+
+        self.posts = 0
+        self.threads = 0
+        self.renders = 0
+        self.times: Dict[str, float] = dict.fromkeys(['generate', 'decode', 'parse', 'draw_map', 'draw_players'], 0.0)
+
+    def _kinds(self) -> List[str]:
+        kinds = [kind for kind, count in self.counts.items() for _ in range(count)]
+        Random(self.seed).shuffle(kinds)
+        return kinds
+
+    def _post(self, kind: str) -> Dict:
+        g = self.generator
+
+        if kind == 'roll_base':
+            return g.roll_base(new=False, same_color=True)
+        if kind == 'explicit':
+            return g.explicit_roll()
+        if kind == 'expansion':
+            return g.expansion_roll()
+        if kind == 'attack':
+            return g.attack_roll()
+        if kind == 'invalid':
+            return g.invalid_post()
+        return g.chatter()
+
+    def _threads(self) -> Iterator[List[Dict]]:
+        kinds = self._kinds()
+        g = self.generator
+
+        while True:
+            start = perf_counter()
+            posts = [g.op_post()]
+
+            # страны регистрируются в начале каждого треда: в первом новые, дальше выжившие
+            if not self.threads:
+                posts += [g.roll_base(new=True) for _ in range(self.players)]
+            else:
+                posts += [g.country_roll_base(player.name) for player in self.controller.dao.players]
+            posts = posts[:self._bump_limit]
+
+            while kinds and len(posts) < self._bump_limit:
+                posts.append(self._post(kinds.pop()))
+
+            self.times['generate'] += perf_counter() - start
+            yield posts
+
+            if not kinds:
+                return
+
+            g.rollover(g.last_num + 1000)
+            self._rollover()
+
+    def _rollover(self) -> None:
+        # как после переката в проде: новый тред начинается с чистыми роллбазами
+        dao = self.controller.dao
+        del dao.empty_players
+        del dao.roll_bases
+        self.controller.start_thread(self.generator.thread_num)
+
+    def _render(self) -> None:
+        start = perf_counter()
+        self.controller.get_map_image()
+        self.times['draw_map'] += perf_counter() - start
+
+        if not self.controller.dao.players:
+            return
+
+        start = perf_counter()
+        self.controller.get_players_image()
+        self.times['draw_players'] += perf_counter() - start
+
+    def _run_thread(self, raw_posts: List[Dict]) -> None:
+        dao = self.controller.dao
+
+        # тред читается так же, как при опросе: каждый раз всё, что есть, но разбираются только новые посты
+        for i in range(0, len(raw_posts), self.batch):
+            start = perf_counter()
+            thread = DvachAPIHandler.build_thread(raw_posts[:i + self.batch], dao.last_number - 1)
+            self.times['decode'] += perf_counter() - start
+
+            last_number = dao.last_number
+            start = perf_counter()
+            self.controller.parse_thread(thread)
+            self.times['parse'] += perf_counter() - start
+            self.posts += dao.last_number - last_number
+
+            if not self.controller.paste_handler.paste:
+                continue
+
+            if self.render:
+                self._render()
+                self.renders += 1
+
+            del self.controller.paste_handler.paste
+
+    def run(self) -> None:
+        if self.memory:
+            start_tracing()
+
+        start = perf_counter()
+
+        game_data = GameData(thread=str(self.generator.thread_num))
+        self.controller = Controller("simulate", game_data=game_data, auto_approve=True)
+
+        for raw_posts in self._threads():
+            self.threads += 1
+            self._run_thread(raw_posts)
+
+        total = perf_counter() - start
+        peak = get_traced_memory()[1] if self.memory else 0
+
+        if self.memory:
+            stop_tracing()
+
+        self._print_report(total, peak)
+
+    @staticmethod
+    def _peak_rss() -> int | None:
+        if not getrusage:
+            return None
+        # ru_maxrss на линуксе в килобайтах, на маке в байтах
+        rss = getrusage(RUSAGE_SELF).ru_maxrss
+        return rss if platform == 'darwin' else rss * 1024
+
+    def _print_report(self, total: float, peak: int) -> None:
+        dao = self.controller.dao
+        parse = self.times['parse']
+
+        print(f"{'  симуляция  ':=^60}")
+        print(f"Тредов: {self.threads}")
+        print(f"Постов обработано: {self.posts}")
+        print(f"Игроков в конце: {len(dao.players)}, клеток занято: {len(dao.get_owned_tiles())}")
+        print(f"Отрисовок: {self.renders}")
+        for phase, seconds in self.times.items():
+            print(f"{phase}: {seconds:.3f} с")
+        print(f"Парсинг: {self.posts / parse if parse else 0:.1f} постов/с")
+        print(f"Всего: {total:.3f} с ({self.posts / total if total else 0:.1f} постов/с)")
+        if (rss := self._peak_rss()) is not None:
+            print(f"Пик памяти процесса (RSS): {rss / 2 ** 20:.1f} МБ")
+        if self.memory:
+            # tracemalloc видит только аллокации питона (без буферов картинок) и замедляет отрисовку в разы
+            print(f"Пик памяти питона: {peak / 2 ** 20:.1f} МБ (время замерено с tracemalloc)")
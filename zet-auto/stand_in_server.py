@@ -0,0 +1,216 @@
+from email.parser import BytesParser
+from email.policy import default
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from random import Random
+from re import compile
+from threading import Event, Lock, Thread
+from time import sleep
+from typing import Dict, List, Tuple
+
+from handlers.thread_generator import ThreadGenerator
+
+
+class StandInBoard:
+    def __init__(self, board: str = 'b', thread_num: int = 100000, seed: int = 0,
+                 latency: float = 0.0, error_rate: float = 0.0, rate_limit: float = 0.0) -> None:
+        self.board = board
+        self.latency = latency          # средняя задержка ответа, с
+        self.error_rate = error_rate    # доля ответов 503
+        self.rate_limit = rate_limit    # доля постингов, отбитых ошибкой -8
+
+        self.seed = seed
+        self.random = Random(seed)
+        self.lock = Lock()
+
+        self.threads: Dict[int, List[Dict]] = {}
+        self.generators: Dict[int, ThreadGenerator] = {}
+        self.active = self._new_thread(thread_num)
+
+        self.stats: Dict[str, int] = {}
+
+    def _new_thread(self, thread_num: int) -> int:
+        generator = ThreadGenerator(seed=self.seed + thread_num, thread_num=thread_num, realtime=True)
+        self.generators[thread_num] = generator
+        self.threads[thread_num] = [generator.op_post()]
+        return thread_num
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def delay(self) -> None:
+        if self.latency:
+            sleep(self.random.expovariate(1 / self.latency))
+
+    def failing(self) -> bool:
+        return self.random.random() < self.error_rate
+
+    def add_synthetic_post(self) -> None:
+        with self.lock:
+            self.threads[self.active].append(self.generators[self.active].random_post())
+
+    def add_post(self, thread_num: int | None, comment: str, sage: bool) -> Tuple[int, int]:
+        with self.lock:
+            if thread_num is None:
+                # перекат: синтетические посты дальше идут в новый тред
+                self.active = self._new_thread(max(g.last_num for g in self.generators.values()) + 1000)
+                return self.active, self.active
+
+            post = self.generators[thread_num].post(comment, sage=sage)
+            self.threads[thread_num].append(post)
+
+            return thread_num, post['num']
+
+    def posts(self, thread_num: int, after_num: int = 0) -> List[Dict] | None:
+        with self.lock:
+            posts = self.threads.get(thread_num)
+            if posts is None:
+                return None
+            return [p for p in posts if p['num'] >= after_num]
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+
+    _thread_path = compile(r'^/(\w+)/res/(\d+)\.json$')
+    _after_path = compile(r'^/api/mobile/v2/after/(\w+)/(\d+)/(\d+)$')
+
+    def log_message(self, *_) -> None:
+        pass
+
+    def _send_json(self, data: Dict, status: int = 200) -> None:
+        body = dumps(data, ensure_ascii=False).encode('utf-8')
+        etag = f'"{md5(body).hexdigest()}"'
+
+        if status == 200 and self.command == 'GET' and self.headers.get('If-None-Match') == etag:
+            self.server.board.count('304')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.server.board.count(str(status))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if status == 200 and self.command == 'GET':
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_unavailable(self) -> None:
+        self.server.board.count('503')
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        board = self.server.board
+        board.delay()
+
+        if board.failing():
+            self._send_unavailable()
+            return
+
+        if r := self._thread_path.match(self.path):
+            posts = board.posts(int(r.group(2)))
+            if posts is None:
+                self._send_json({'error': {'code': -3, 'message': 'Тред не существует'}}, 404)
+                return
+            self._send_json({'threads': [{'posts': posts}]})
+            return
+
+        if r := self._after_path.match(self.path):
+            posts = board.posts(int(r.group(2)), int(r.group(3)))
+            if posts is None:
+                self._send_json({'error': {'code': -3, 'message': 'Тред не существует'}})
+                return
+            self._send_json({'posts': posts})
+            return
+
+        self._send_json({'error': {'code': -1, 'message': 'Not found'}}, 404)
+
+    def _read_form(self) -> Dict[str, str]:
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        message = BytesParser(policy=default).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body
+        )
+
+        form = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            if part.get_filename():
+                form.setdefault('files', '')
+                form['files'] += part.get_filename() + ' '
+            elif name:
+                form[name] = part.get_content()
+        return form
+
+    def do_POST(self) -> None:
+        board = self.server.board
+        board.delay()
+
+        if not self.path.startswith('/user/posting'):
+            self._send_json({'error': {'code': -1, 'message': 'Not found'}}, 404)
+            return
+
+        form = self._read_form()
+
+        if board.failing():
+            self._send_unavailable()
+            return
+
+        if board.random.random() < board.rate_limit:
+            self._send_json({'result': 0, 'error': {'code': -8, 'message': 'Вы постите слишком быстро'}})
+            return
+
+        thread = form.get('thread')
+        thread_num = int(thread) if thread else None
+
+        if thread_num is not None and board.posts(thread_num) is None:
+            self._send_json({'result': 0, 'error': {'code': -3, 'message': 'Тред не существует'}})
+            return
+
+        thread_num, num = board.add_post(thread_num, form.get('comment', ''), form.get('email') == 'sage')
+
+        if thread is None or thread == '':
+            self._send_json({'result': 1, 'thread': thread_num})
+        else:
+            self._send_json({'result': 1, 'num': num})
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, board: StandInBoard, host: str = '127.0.0.1', port: int = 0, post_rate: float = 0.0) -> None:
+        super().__init__((host, port), StandInRequestHandler)
+        self.board = board
+        self.post_rate = post_rate  # синтетических постов в секунду
+
+        self._stopped = Event()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _generate_posts(self) -> None:
+        while not self._stopped.wait(self.board.random.expovariate(self.post_rate)):
+            self.board.add_synthetic_post()
+
+    def start_generator(self) -> None:
+        if self.post_rate:
+            Thread(target=self._generate_posts, daemon=True).start()
+
+    def start(self) -> None:
+        Thread(target=self.serve_forever, daemon=True).start()
+        self.start_generator()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.shutdown()
+        self.server_close()
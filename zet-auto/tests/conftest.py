@@ -0,0 +1,5 @@
+from pathlib import Path
+from sys import path
+
+# модули проекта импортируются от корня zet-auto, как при запуске через __main__
+path.insert(0, str(Path(__file__).parent.parent))
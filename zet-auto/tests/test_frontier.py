@@ -0,0 +1,62 @@
+from random import Random
+from typing import Dict
+
+import pytest
+
+from handlers.resources_handler import ResourcesHandler
+from model.dao import GameDataDAO
+from model.models import GameData, Player
+
+
+def brute_nearest(dao: GameDataDAO, player: Player, enemy: Player | None) -> str | None:
+    # прежний перебор: клетки игрока по порядку, их маршруты по порядку,
+    # при равных расстояниях побеждает кандидат, встреченный первым
+    graph = ResourcesHandler.get_graph()
+    owned = set(dao.get_owned_tiles())
+
+    tiles: Dict[int, float] = {}
+    for tile in map(graph.index.__getitem__, player.tiles):
+        for routed in graph.neighbors(tile):
+            if enemy is None:
+                if graph.ids[routed] in owned:
+                    continue
+            elif enemy is player or graph.ids[routed] not in enemy.tiles:
+                continue
+
+            distance = graph.distance(tile, routed)
+            tiles[routed] = min(tiles.get(routed, distance), distance)
+
+    if not tiles:
+        return None
+    return graph.ids[min(tiles, key=tiles.get)]
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_matches_brute_force_scan(seed):
+    rng = Random(seed)
+    ids = ResourcesHandler.get_graph().ids
+
+    dao = GameDataDAO(GameData(board='b', thread='1'))
+    players = [dao.add_player(f"Игрок {i}", f"#{i:02d}0000") for i in range(rng.randint(2, 6))]
+    for player in players:
+        dao.add_tile(player, rng.choice(ids))
+
+    for _ in range(400):
+        player = rng.choice(players)
+        action = rng.random()
+
+        if action < 0.4:
+            tile_id = dao.get_nearest_free_tile(player)
+            assert tile_id == brute_nearest(dao, player, None)
+        elif action < 0.8:
+            enemy = rng.choice(players)
+            tile_id = dao.get_nearest_enemy_tile(player, enemy)
+            assert tile_id == brute_nearest(dao, player, enemy)
+        elif action < 0.9:
+            tile_id = rng.choice(ids)
+        else:
+            dao.del_tile(rng.choice(ids))
+            continue
+
+        if tile_id:
+            dao.add_tile(player, tile_id)
@@ -0,0 +1,91 @@
+import pytest
+
+from handlers.saves_handler import SavesHandler
+from model.dao import GameDataDAO
+from model.models import GameData
+
+
+@pytest.fixture
+def saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(SavesHandler, '_path', tmp_path)
+    return tmp_path
+
+
+def test_restores_snapshot_and_journal_tail(saves):
+    SavesHandler.dump('game', GameData(board='b', thread='1'))
+
+    dao = GameDataDAO.load('game', writable=True)
+    player = dao.add_player('Россия', '#ff0000')
+    dao.add_roll_base(player, 10)
+    dao.add_tile(player, '1a')
+    dao.add_tile(player, '2a')
+    dao.del_tile('1a')
+    dao.last_number = 42
+    dao.save('game')
+
+    restored = GameDataDAO.load('game')
+    assert [(p.name, p.tiles) for p in restored.players] == [('Россия', ['2a'])]
+    assert [rb.post_num for rb in restored.roll_bases] == [10]
+    assert restored.last_number == 42
+
+
+def test_crash_mid_write_does_not_swallow_later_events(saves):
+    SavesHandler.dump('game', GameData(board='b', thread='1'))
+
+    dao = GameDataDAO.load('game', writable=True)
+    player = dao.add_player('Россия', '#ff0000')
+    dao.add_tile(player, '1a')
+    dao.save('game')
+
+    # падение посреди записи следующего действия
+    path = SavesHandler.get_journal_path('game')
+    with path.open('a', encoding='utf-8') as f:
+        f.write('[9,"t","2')
+
+    dao = GameDataDAO.load('game', writable=True)
+    assert dao.players[0].tiles == ['1a']
+
+    dao.add_tile(dao.get_player(name='Россия'), '3a')
+    dao.last_number = 77
+    dao.save('game')
+
+    restored = GameDataDAO.load('game')
+    assert restored.players[0].tiles == ['1a', '3a']
+    assert restored.last_number == 77
+
+
+def test_complete_line_without_newline_is_dropped(saves):
+    SavesHandler.dump('game', GameData(board='b', thread='1'))
+
+    dao = GameDataDAO.load('game', writable=True)
+    dao.add_player('Россия', '#ff0000')
+    dao.save('game')
+
+    path = SavesHandler.get_journal_path('game')
+    with path.open('a', encoding='utf-8') as f:
+        f.write('[9,"s","last_number",5]')
+
+    dao = GameDataDAO.load('game', writable=True)
+    dao.last_number = 6
+    dao.save('game')
+
+    assert GameDataDAO.load('game').last_number == 6
+
+
+def test_read_only_load_leaves_torn_journal_alone(saves):
+    SavesHandler.dump('game', GameData(board='b', thread='1'))
+
+    dao = GameDataDAO.load('game', writable=True)
+    dao.add_player('Россия', '#ff0000')
+    dao.save('game')
+
+    path = SavesHandler.get_journal_path('game')
+    with path.open('a', encoding='utf-8') as f:
+        f.write('[9,"s","last_number",5]')
+    before = path.read_bytes()
+
+    restored = GameDataDAO.load('game')
+    assert [p.name for p in restored.players] == ['Россия']
+    assert restored.last_number != 5
+    assert restored.journal is None
+    assert path.read_bytes() == before
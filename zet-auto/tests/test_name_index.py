@@ -0,0 +1,75 @@
+from difflib import get_close_matches
+from random import Random
+
+import pytest
+
+from model.name_index import NameIndex
+
+_VOWELS = 'аеиоуыэюя'
+_CONSONANTS = 'бвгджзйклмнпрстфхцчшщ'
+_ENDINGS = ['', 'ия', 'ск', 'ов', ' республика', 'ская империя']
+
+
+def random_name(rng: Random) -> str:
+    name = ''.join(rng.choice(_CONSONANTS) + rng.choice(_VOWELS) for _ in range(rng.randint(1, 4)))
+    return (name + rng.choice(_ENDINGS)).capitalize()
+
+
+def typo(rng: Random, name: str) -> str:
+    # как в роллах против: строчными, с пропущенными и лишними буквами
+    word = ''.join(ch for ch in name.lower() if rng.random() > 0.15)
+    return word + rng.choice(['', 'а', 'ия', ' '])
+
+
+def expected(word: str, names, cutoff: float) -> str | None:
+    matches = get_close_matches(word, names, n=1, cutoff=cutoff)
+    return matches[0] if matches else None
+
+
+@pytest.mark.parametrize("cutoff", [0.6, 0.75, 0.9, 1.0, 0.3, 0.0])
+def test_matches_get_close_matches(cutoff):
+    rng = Random(int(cutoff * 100))
+    names = list({random_name(rng) for _ in range(300)})
+    index = NameIndex(names)
+
+    for _ in range(300):
+        word = typo(rng, rng.choice(names)) if rng.random() < 0.8 else random_name(rng).lower()
+        assert index.closest(word, cutoff) == expected(word, names, cutoff), word
+
+
+def test_follows_added_and_removed_names():
+    rng = Random(1)
+    names = set()
+    index = NameIndex()
+
+    for _ in range(1000):
+        if names and rng.random() < 0.3:
+            name = rng.choice(sorted(names))
+            names.remove(name)
+            index.remove(name)
+        else:
+            name = random_name(rng)
+            names.add(name)
+            index.add(name)
+
+        word = typo(rng, rng.choice(sorted(names))) if names else 'россия'
+        assert index.closest(word) == expected(word, list(names), 0.6), word
+
+    assert len(index) == len(names)
+
+
+def test_ties_go_to_the_larger_name():
+    names = ['ab', 'ba', 'abc', 'acb']
+    index = NameIndex(names)
+
+    for word in ['ab', 'ba', 'a', 'b', 'cab', 'bca']:
+        assert index.closest(word, 0.5) == expected(word, names, 0.5), word
+
+
+def test_edge_cases():
+    index = NameIndex(['Россия', 'Русь'])
+
+    assert index.closest('') is None
+    assert index.closest('zzz') is None
+    assert index.closest('россия') == expected('россия', ['Россия', 'Русь'], 0.6)
+    assert index.closest('Русь', 1.0) == 'Русь'
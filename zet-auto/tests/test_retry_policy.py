@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from requests import Response
+
+from api.retry_policy import CircuitBreaker, RetryPolicy, Verdict
+
+
+def response(status: int = 200, body: dict | None = None) -> Response:
+    r = Response()
+    r.status_code = status
+    r._content = json.dumps(body or {}).encode()
+    return r
+
+
+def error(code: int) -> Response:
+    return response(body={'result': 0, 'error': {'code': code, 'message': ''}})
+
+
+@pytest.mark.parametrize("code", [-2, -3, -5, -7, -9, -10, -11, -12, -13])
+def test_fatal_code_does_not_open_breaker(code):
+    policy = RetryPolicy(breaker=CircuitBreaker(threshold=1, cooldown=300))
+
+    verdict, _ = policy.classify(error(code))
+    policy.record(verdict)
+
+    assert verdict is Verdict.FATAL
+    assert not policy.should_retry(verdict, 0)
+    assert policy.allow()
+    assert not policy.breaker.is_open
+
+
+@pytest.mark.parametrize("code", [-4, -6])
+def test_ban_opens_breaker(code):
+    policy = RetryPolicy(breaker=CircuitBreaker(threshold=5, cooldown=300))
+
+    verdict, _ = policy.classify(error(code))
+    policy.record(verdict)
+
+    assert verdict is Verdict.BLOCKED
+    assert not policy.allow()
+
+
+def test_retryable_failures_open_breaker_at_threshold():
+    policy = RetryPolicy(breaker=CircuitBreaker(threshold=3, cooldown=300))
+
+    for _ in range(2):
+        policy.record(policy.classify(response(503))[0])
+        assert policy.allow()
+
+    policy.record(policy.classify(None, ConnectionError())[0])
+    assert not policy.allow()
+
+    policy.breaker.cooldown = 0
+    policy.record(policy.classify(response(body={'result': 1}))[0])
+    assert policy.allow() and not policy.breaker.is_open
@@ -0,0 +1,75 @@
+from random import Random
+from re import compile
+
+import pytest
+
+from handlers.comment_parser import CommentParser
+
+# прежняя реализация на регулярках, с которой должны совпадать таблицы
+_ROLL_SPECIALS = (
+    (compile(r"^.*?((\d)\2(?!\2))((\d)(\4{2}))$"), 4),  # 11999 (2+3)
+    (compile(r"^.*?((\d)\2{2}(?!\2))((\d)(\4))$"), 4),  # 11199 (3+2)
+    (compile(r"^.*?((\d)\2(?!\2))((\d)(\4))$"),    2),  # 1199  (2+2)
+)
+
+
+def old_roll_value(num: int | str) -> int:
+    vals = {
+        1: 0,
+        2: 1,
+        3: 3,
+        4: 5,
+        5: 8,
+    }
+
+    num = str(num)
+
+    for pattern, value in _ROLL_SPECIALS:
+        if pattern.match(num):
+            return value
+
+    num = num[::-1]
+
+    c = 1
+    while c < len(num) and num[c - 1] == num[c]:
+        c += 1
+
+    return vals.get(c, vals[5])
+
+
+def test_full_ranges():
+    nums = range(1_200_000)
+    assert CommentParser.get_roll_values(nums) == [old_roll_value(num) for num in nums]
+
+
+def test_random_large_numbers():
+    rng = Random(0)
+    nums = [rng.randrange(10 ** rng.randint(5, 15)) for _ in range(100_000)]
+
+    # длинные серии одинаковых цифр в хвосте случайно почти не выпадают
+    nums += [int(f"{rng.randrange(1, 10 ** 6)}{str(rng.randrange(10)) * rng.randint(1, 9)}") for _ in range(20_000)]
+    nums += [int(str(d) * n) for d in range(1, 10) for n in range(1, 16)]
+
+    assert CommentParser.get_roll_values(nums) == [old_roll_value(num) for num in nums]
+    assert [CommentParser.get_roll_value(num) for num in nums] == [old_roll_value(num) for num in nums]
+
+
+@pytest.mark.parametrize("num, value", [
+    (1199, 2),
+    (11199, 4),
+    (11999, 4),
+    (111199, 4),
+    (1111999, 4),
+    (21199, 2),
+    (221199, 2),
+    (12211199, 4),
+    (123411999, 4),
+    (99911, 4),
+    (9911, 2),
+    (1111, 5),
+    (11111, 8),
+    (1111111, 8),
+])
+def test_special_cases(num, value):
+    assert CommentParser.get_roll_value(num) == old_roll_value(num) == value
+    assert CommentParser.get_roll_value(str(num)) == value